@@ -1,4 +1,4 @@
 from .get_data import VoyZendeskAPI
-from .utils import clean_html, extract_article_body
+from .utils import clean_html, clean_html_many, extract_article_body
 
-__all__ = ["VoyZendeskAPI", "clean_html", "extract_article_body"]
+__all__ = ["VoyZendeskAPI", "clean_html", "clean_html_many", "extract_article_body"]
@@ -3,8 +3,14 @@ import time
 import requests
 import json
 import os
-from typing import Dict, List, Any
+import glob
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Set, Tuple
+from requests.adapters import HTTPAdapter
 from .utils import clean_html
+from .rate_limit import TokenBucket
+from rag.constants import CHUNKER
 
 logger = logging.getLogger(__name__)
 
@@ -14,25 +20,76 @@ class VoyZendeskAPI:
 
     BASE_URL = "https://joinvoy.zendesk.com/api/v2/help_center/en-gb"
 
-    def __init__(self, rate_limit_delay: float = 0.5):
+    def __init__(
+        self,
+        rate_limit_delay: float = 0.1,
+        base_url: Optional[str] = None,
+        max_workers: int = 4,
+    ):
         self.rate_limit_delay = rate_limit_delay
+        self.base_url = base_url or self.BASE_URL
+        self.max_workers = max_workers
+
+        # average spacing of rate_limit_delay, with bursts of up to max_workers
+        self.rate_limiter = None
+        if rate_limit_delay > 0:
+            self.rate_limiter = TokenBucket(
+                rate=1.0 / rate_limit_delay, capacity=max_workers
+            )
+
+        # pooled keep-alive connections shared by all workers plus the lister
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers + 1)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
         logger.info("Initialised Zendesk API class")
 
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Seconds the server asked us to wait, if it said"""
+        value = response.headers.get("Retry-After")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None  # HTTP-date form, fall back to backoff
+
     def _make_request(self, endpoint: str) -> Dict[str, Any]:
         """Make GET request to API endpoint, with rate limiting"""
-        url = f"{self.BASE_URL}/{endpoint}"
+        # pagination links come back as absolute URLs
+        if endpoint.startswith("http"):
+            url = endpoint
+        else:
+            url = f"{self.base_url}/{endpoint}"
         logger.debug(f"Making request to {url}")
 
-        # pro-active rate limiting
-        time.sleep(self.rate_limit_delay)
-
         max_retries = 3
         retry_count = 0
         backoff_time = 1.0
 
         while retry_count <= max_retries:
+            # pro-active rate limiting
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
             try:
-                response = requests.get(url)
+                response = self.session.get(url, timeout=30)
+
+                # honour the server's throttling rather than guessing a backoff
+                if response.status_code in (429, 503) and retry_count < max_retries:
+                    retry_count += 1
+                    wait = self._retry_after(response) or backoff_time
+                    logger.warning(
+                        f"Throttled ({response.status_code}), retrying in {wait:.1f}s (Attempt {retry_count}/{max_retries})"
+                    )
+                    # with a limiter, the next acquire() blocks for the pause
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.pause(wait)
+                    else:
+                        time.sleep(wait)
+                    backoff_time *= 2
+                    continue
+
                 response.raise_for_status()
 
                 return response.json()
@@ -54,17 +111,40 @@ class VoyZendeskAPI:
 
         raise RuntimeError("Request failed with unknown error")
 
+    def _iter_paginated(self, endpoint: str, key: str) -> Iterator[Dict[str, Any]]:
+        """Yield items from every page of a list endpoint, following next_page"""
+        next_page = endpoint
+        while next_page:
+            response = self._make_request(next_page)
+            yield from response.get(key, [])
+            next_page = response.get("next_page")
+
+    def iter_categories(self) -> Iterator[Dict[str, Any]]:
+        """Stream FAQ categories"""
+        logger.info("Fetching all categories")
+        return self._iter_paginated("categories.json?per_page=100", "categories")
+
+    def iter_sections_by_category(self, category_id: int) -> Iterator[Dict[str, Any]]:
+        """Stream sections for a given category"""
+        logger.info(f"Fetching sections for category {category_id}")
+        return self._iter_paginated(
+            f"categories/{category_id}/sections.json?per_page=100", "sections"
+        )
+
+    def iter_articles_by_section(self, section_id: int) -> Iterator[Dict[str, Any]]:
+        """Stream all articles for a given section"""
+        logger.info(f"Fetching articles for section {section_id}")
+        return self._iter_paginated(
+            f"sections/{section_id}/articles.json?per_page=100", "articles"
+        )
+
     def get_all_categories(self) -> List[Dict[str, Any]]:
         """Fetch FAQ categories"""
-        logger.info("Fetching all categories")
-        response = self._make_request("categories.json")
-        return response.get("categories", [])
+        return list(self.iter_categories())
 
     def get_sections_by_category(self, category_id: int) -> List[Dict[str, Any]]:
         """Fetch sections for a given category"""
-        logger.info(f"Fetching sections for category {category_id}")
-        response = self._make_request(f"categories/{category_id}/sections.json")
-        return response.get("sections", [])
+        return list(self.iter_sections_by_category(category_id))
 
     def get_article(self, article_id: int) -> Dict[str, Any]:
         """Fetch a specific article by ID"""
@@ -74,14 +154,51 @@ class VoyZendeskAPI:
 
     def get_articles_by_section(self, section_id: int) -> List[Dict[str, Any]]:
         """Fetch all articles for a given section"""
-        logger.info(f"Fetching articles for section {section_id}")
-        response = self._make_request(f"sections/{section_id}/articles.json")
-        return response.get("articles", [])
+        return list(self.iter_articles_by_section(section_id))
 
-    def extract_all_articles(
+    def _iter_article_listings(self) -> Iterator[Dict[str, Any]]:
+        """Walk categories and sections lazily, yielding article metadata"""
+        for category in self.iter_categories():
+            category_id = category["id"]
+            category_name = category["name"]
+
+            for section in self.iter_sections_by_category(category_id):
+                section_id = section["id"]
+                section_name = section["name"]
+
+                for article_listing in self.iter_articles_by_section(section_id):
+                    yield {
+                        "article_id": article_listing["id"],
+                        "category_id": category_id,
+                        "category_name": category_name,
+                        "section_id": section_id,
+                        "section_name": section_name,
+                        "title": article_listing.get("title", ""),
+                    }
+
+    def _finish_article(
+        self,
+        article_meta: Dict[str, Any],
+        future: Future,
+        save_raw: bool,
+        raw_dir: str,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Wait for a fetched article and save it"""
+        article_id = article_meta["article_id"]
+        article = future.result()
+
+        if save_raw:
+            file_path = os.path.join(raw_dir, f"article_{article_id}.json")
+            logger.info(f"Saving raw article to {file_path}")
+            with open(file_path, "w") as f:
+                json.dump(article, f, indent=2)
+
+        return article, article_meta
+
+    def iter_raw_articles(
         self, save_raw: bool = True, raw_dir: str = "../data/raw"
-    ) -> List[Dict[str, Any]]:
-        """Extract all articles from the Zendesk API"""
+    ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Stream (raw article, listing metadata), fetching while listing continues"""
 
         logger.info("Beginning article extraction")
 
@@ -89,73 +206,198 @@ class VoyZendeskAPI:
             # store raw data here
             os.makedirs(raw_dir, exist_ok=True)
 
-        all_articles = []
+        # article fetches run on the pool as soon as each listing arrives; the
+        # bounded window keeps memory flat and results in listing order
+        max_in_flight = self.max_workers * 2
+        pending = deque()
+        count = 0
 
-        # step 1: collect all article IDs by traversing the categories and sections
-        article_ids = []
-        categories = self.get_all_categories()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for article_meta in self._iter_article_listings():
+                future = executor.submit(self.get_article, article_meta["article_id"])
+                pending.append((article_meta, future))
 
-        for category in categories:
-            category_id = category["id"]
-            category_name = category["name"]
+                while len(pending) >= max_in_flight:
+                    count += 1
+                    yield self._finish_article(*pending.popleft(), save_raw, raw_dir)
 
-            sections = self.get_sections_by_category(category_id)
+            while pending:
+                count += 1
+                yield self._finish_article(*pending.popleft(), save_raw, raw_dir)
 
-            for section in sections:
-                section_id = section["id"]
-                section_name = section["name"]
+        logger.info(f"Extracted {count} articles")
 
-                article_listings = self.get_articles_by_section(section_id)
-
-                for article_listing in article_listings:
-                    article_ids.append(
-                        {
-                            "article_id": article_listing["id"],
-                            "category_id": category_id,
-                            "category_name": category_name,
-                            "section_id": section_id,
-                            "section_name": section_name,
-                            "title": article_listing.get("title", ""),
-                        }
-                    )
+    def iter_articles(
+        self, save_raw: bool = True, raw_dir: str = "../data/raw"
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream processed articles"""
+        for article, article_meta in self.iter_raw_articles(save_raw, raw_dir):
+            yield self.process_article(article, article_meta)
 
-        # step 2: fetch each article's data
-        logger.info(f"Found {len(article_ids)} articles to fetch")
-        for idx, article_meta in enumerate(article_ids):
-            article_id = article_meta["article_id"]
-            logger.info(f"Fetching article {idx+1}/{len(article_ids)}: {article_id}")
+    def extract_all_articles(
+        self,
+        save_raw: bool = True,
+        raw_dir: str = "../data/raw",
+        clean_workers: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Extract all articles from the Zendesk API
+
+        With clean_workers > 1, HTML cleaning runs across that many processes
+        once fetching is done, instead of article by article as they arrive.
+        """
+        if not clean_workers or clean_workers < 2:
+            return list(self.iter_articles(save_raw=save_raw, raw_dir=raw_dir))
+
+        raw = list(self.iter_raw_articles(save_raw, raw_dir))
+        if not raw:
+            return []
+        articles, metas = zip(*raw)
+        batch = max(1, len(raw) // (clean_workers * 8))
+        with ProcessPoolExecutor(max_workers=clean_workers) as pool:
+            return list(
+                pool.map(self.process_article, articles, metas, chunksize=batch)
+            )
+
+    @staticmethod
+    def process_article(
+        article: Dict[str, Any], article_meta: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Clean a raw article and attach its category and section"""
+        article_body = article.get("body", "")
+        # the sentence chunker splits on the headings, paragraphs and list items kept here
+        cleaned_body = clean_html(article_body, keep_structure=CHUNKER == "sentence")
+
+        return {  # create structured article data object
+            "id": article.get("id", article_meta.get("article_id")),
+            "title": article.get("title", ""),
+            "body": cleaned_body,
+            "html_body": article_body,
+            "url": article.get("html_url", ""),
+            "category": {
+                "id": article_meta["category_id"],
+                "name": article_meta["category_name"],
+            },
+            "section": {
+                "id": article_meta["section_id"],
+                "name": article_meta["section_name"],
+            },
+            "tags": article.get("label_names", []),
+            "created_at": article.get("created_at", ""),
+            "updated_at": article.get("updated_at", ""),
+        }
+
+    @staticmethod
+    def get_high_water_mark(raw_dir: str = "../data/raw") -> Optional[str]:
+        """Latest updated_at across previously saved raw articles"""
+        latest = None
+        for file_path in glob.glob(os.path.join(raw_dir, "article_*.json")):
+            with open(file_path, "r") as f:
+                updated_at = json.load(f).get("updated_at", "")
+            # Zendesk timestamps are ISO 8601 UTC, so string order is time order
+            if updated_at and (latest is None or updated_at > latest):
+                latest = updated_at
+        return latest
+
+    def _get_section_index(self) -> Dict[int, Dict[str, Any]]:
+        """Map section ID to its section and category names"""
+        categories = {
+            category["id"]: category["name"]
+            for category in self._iter_paginated("categories.json", "categories")
+        }
+        return {
+            section["id"]: {
+                "category_id": section.get("category_id"),
+                "category_name": categories.get(section.get("category_id"), ""),
+                "section_id": section["id"],
+                "section_name": section.get("name", ""),
+            }
+            for section in self._iter_paginated(
+                "sections.json?per_page=100", "sections"
+            )
+        }
+
+    def extract_updated_articles(
+        self,
+        since: Optional[str],
+        save_raw: bool = True,
+        raw_dir: str = "../data/raw",
+    ) -> List[Dict[str, Any]]:
+        """Extract only articles updated after the `since` timestamp"""
+        logger.info(f"Beginning incremental extraction (since {since})")
 
-            article = self.get_article(article_id)
+        if save_raw:
+            os.makedirs(raw_dir, exist_ok=True)
 
-            # step 3: save and process article data
+        # the article list already carries full bodies, newest first, so we can
+        # stop paging as soon as we reach an article we've seen before
+        updated = []
+        next_page = "articles.json?sort_by=updated_at&sort_order=desc&per_page=100"
+        while next_page:
+            response = self._make_request(next_page)
+            page = response.get("articles", [])
+            fresh = [
+                article
+                for article in page
+                if since is None or article.get("updated_at", "") > since
+            ]
+            updated.extend(fresh)
+            if len(fresh) < len(page):
+                break
+            next_page = response.get("next_page")
+
+        logger.info(f"Found {len(updated)} updated articles")
+        if not updated:
+            return []
+
+        # only look up category/section names when something actually changed
+        sections = self._get_section_index()
+
+        processed = []
+        for article in updated:
             if save_raw:
-                file_path = os.path.join(raw_dir, f"article_{article_id}.json")
-                logger.info(f"Saving raw article to {file_path}")
+                file_path = os.path.join(raw_dir, f"article_{article['id']}.json")
                 with open(file_path, "w") as f:
                     json.dump(article, f, indent=2)
 
-            article_body = article.get("body", "")
-            cleaned_body = clean_html(article_body)
-
-            processed_article = {  # create structured article data object
-                "id": article_id,
-                "title": article.get("title", ""),
-                "body": cleaned_body,
-                "html_body": article_body,
-                "url": article.get("html_url", ""),
-                "category": {
-                    "id": article_meta["category_id"],
-                    "name": article_meta["category_name"],
+            article_meta = sections.get(
+                article.get("section_id"),
+                {
+                    "category_id": None,
+                    "category_name": "",
+                    "section_id": article.get("section_id"),
+                    "section_name": "",
                 },
-                "section": {
-                    "id": article_meta["section_id"],
-                    "name": article_meta["section_name"],
-                },
-                "tags": article.get("label_names", []),
-                "created_at": article.get("created_at", ""),
-                "updated_at": article.get("updated_at", ""),
-            }
-
-            all_articles.append(processed_article)
-
-        return all_articles
+            )
+            processed.append(self.process_article(article, article_meta))
+
+        return processed
+
+    def get_article_ids(self) -> Set[int]:
+        """IDs of every article currently published, one request per 100"""
+        return {
+            article["id"]
+            for article in self._iter_paginated(
+                "articles.json?per_page=100", "articles"
+            )
+        }
+
+    @staticmethod
+    def merge_articles(
+        existing: List[Dict[str, Any]],
+        updated: List[Dict[str, Any]],
+        current_ids: Optional[Set[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Replace changed articles in place and append new ones
+
+        With current_ids, articles no longer in Zendesk are dropped, since an
+        updated-since listing never mentions deletions.
+        """
+        updated_by_id = {article["id"]: article for article in updated}
+        merged = [updated_by_id.pop(article["id"], article) for article in existing]
+        merged.extend(updated_by_id.values())
+        if current_ids is not None:
+            kept = [article for article in merged if article["id"] in current_ids]
+            if len(kept) < len(merged):
+                logger.info(f"Dropped {len(merged) - len(kept)} deleted articles")
+            merged = kept
+        return merged
@@ -0,0 +1,39 @@
+import time
+import threading
+from typing import Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket for pacing requests across workers"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate  # tokens added per second
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so every worker backs off, e.g. after a 429"""
+        with self._lock:
+            self._refill()
+            # resume at the later of the current pause and now + seconds; several
+            # workers hitting the same 429 should not stack their waits
+            self.tokens = min(self.tokens, -seconds * self.rate)
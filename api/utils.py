@@ -1,39 +1,191 @@
 import logging
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Iterable, List
 import re
 
 logger = logging.getLogger(__name__)
 
+# tags that start a new line when structure is kept
+BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "tr", "table", "blockquote", "pre"}
+BLOCK_TAGS |= {"h1", "h2", "h3", "h4", "h5", "h6", "hr", "section", "article"}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# BeautifulSoup keeps these as non-text strings, left out of get_text
+HIDDEN_TAGS = {"script", "style", "template"}
+LINE_BREAK = None  # marker between text pieces for a block boundary
 
-def clean_html(html_content: str) -> str:
-    """Remove HTML tags and normalise whitespace"""
-    if not html_content:
-        return ""
 
-    # parse HTML
-    soup = BeautifulSoup(html_content, "html.parser")
+class _TextExtractor(HTMLParser):
+    """One streaming pass over HTML, collecting text the way BeautifulSoup would
 
-    # extract text content
-    text = soup.get_text(separator=" ", strip=True)
+    Text runs between tags are stripped and kept if non-empty, matching
+    soup.get_text(separator=" ", strip=True). Text inside the first
+    div.article-body is also collected separately, so callers needing only
+    the article don't parse the page twice.
+    """
 
-    # normalise whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+    def __init__(self, keep_structure=False):
+        # references are resolved below, the way BeautifulSoup does
+        super().__init__(convert_charrefs=False)
+        self.keep_structure = keep_structure
+        self.pieces = []  # all text, plus LINE_BREAK markers
+        self.body_pieces = None  # text inside div.article-body, once found
+        self._pending = []
+        self._body_depth = 0  # open divs inside div.article-body
+        self._body_done = False
+        self._hidden = 0  # open script/style/template tags
 
-    return text
+    def _flush(self):
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if text:
+            self._add(text)
 
+    def _add(self, piece):
+        self.pieces.append(piece)
+        if self._body_depth:
+            self.body_pieces.append(piece)
 
-def extract_article_body(html_content: str) -> str:
-    """Extract article-body class content from HTML"""
+    def _block(self, tag, opening):
+        if not self.keep_structure or tag not in BLOCK_TAGS:
+            return
+        self._add(LINE_BREAK)
+        # markdown-style markers survive chunking and embedding as plain text
+        if opening and tag in HEADING_TAGS:
+            self._add("#" * int(tag[1]))
+        elif opening and tag == "li":
+            self._add("-")
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in HIDDEN_TAGS:
+            self._hidden += 1
+        if tag == "div":
+            if self._body_depth:
+                self._body_depth += 1
+            elif (
+                not self._body_done
+                and "article-body" in (dict(attrs).get("class") or "").split()
+            ):
+                self.body_pieces = []
+                self._body_depth = 1
+        self._block(tag, opening=True)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+        self._block(tag, opening=True)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in HIDDEN_TAGS and self._hidden:
+            self._hidden -= 1
+        self._block(tag, opening=False)
+        if tag == "div" and self._body_depth:
+            self._body_depth -= 1
+            self._body_done = not self._body_depth
+
+    def handle_data(self, data):
+        if not self._hidden:
+            self._pending.append(data)
+
+    def handle_entityref(self, name):
+        # unknown names are literal text, without the semicolon
+        self.handle_data(html5.get(f"{name};", f"&{name}"))
+
+    def handle_charref(self, name):
+        self.handle_data(unescape(f"&#{name};"))
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        # CDATA sections are text to BeautifulSoup too
+        if data.startswith("CDATA["):
+            self._pending.append(data[len("CDATA[") :])
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _join(pieces, keep_structure):
+    """Join text pieces with spaces, and lines at block boundaries if kept"""
+    if not keep_structure:
+        text = " ".join(piece for piece in pieces if piece is not LINE_BREAK)
+        return re.sub(r"\s+", " ", text).strip()
+
+    lines, line = [], []
+    for piece in pieces + [LINE_BREAK]:
+        if piece is not LINE_BREAK:
+            line.append(piece)
+            continue
+        text = re.sub(r"\s+", " ", " ".join(line)).strip()
+        # a heading or bullet marker with no text after it is dropped
+        if text and text.strip("#-").strip():
+            lines.append(text)
+        line = []
+    return "\n".join(lines)
+
+
+def _parse(html_content, keep_structure):
+    parser = _TextExtractor(keep_structure)
+    parser.feed(html_content)
+    parser.close()
+    return parser
+
+
+def clean_html(html_content: str, keep_structure: bool = False) -> str:
+    """Remove HTML tags and normalise whitespace
+
+    With keep_structure, block elements start new lines, headings are
+    prefixed with "#" and list items with "-", so the chunker can split on them.
+    """
     if not html_content:
         return ""
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    return _join(_parse(html_content, keep_structure).pieces, keep_structure)
 
-    # locate article-body div where the article content exists
-    article_body = soup.find("div", class_="article-body")
 
-    if article_body:
-        return clean_html(str(article_body))
+def extract_article_body(html_content: str, keep_structure: bool = False) -> str:
+    """Extract article-body class content from HTML"""
+    if not html_content:
+        return ""
+
+    # one parse collects both the whole page and the article-body div
+    parser = _parse(html_content, keep_structure)
+
+    if parser.body_pieces is not None:
+        return _join(parser.body_pieces, keep_structure)
     else:
         logger.warning("Could not find article body in HTML")
-        return clean_html(html_content)
+        return _join(parser.pieces, keep_structure)
+
+
+def clean_html_many(
+    html_contents: Iterable[str], workers: int = None, keep_structure: bool = False
+) -> List[str]:
+    """clean_html over many documents, across processes when workers > 1"""
+    html_contents = list(html_contents)
+    if not workers or workers < 2:
+        return [clean_html(html, keep_structure) for html in html_contents]
+
+    batch = max(1, len(html_contents) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(
+            pool.map(
+                clean_html,
+                html_contents,
+                [keep_structure] * len(html_contents),
+                chunksize=batch,
+            )
+        )
@@ -0,0 +1,115 @@
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from jinja2 import Environment, FileSystemLoader
+from pathlib import Path
+import json
+import logging
+from rag.llm import RAG
+from rag.turn_cache import TurnCache
+from rag.embedding_client import normalise_query
+from rag.constants import MODEL_NAME, TEMPERATURE, K
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+frontend = Path(__file__).resolve().parent.parent / "frontend"
+
+templates = Environment(loader=FileSystemLoader(frontend / "templates"))
+# the template is shared with flask, so mimic its url_for signature
+templates.globals["url_for"] = lambda endpoint, filename: f"/{endpoint}/{filename}"
+
+
+def create_app(rag=None):
+    """Async twin of app/web.py
+
+    Requests await the embedding and LLM calls instead of holding a worker
+    thread for their whole duration, so one process serves many chats at once.
+    """
+    if rag is None:
+        rag = RAG(model_name=MODEL_NAME, temperature=TEMPERATURE)
+    turns = TurnCache()
+
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"])
+    app.mount("/static", StaticFiles(directory=frontend / "static"), name="static")
+
+    async def turn_context(data, query):
+        """Retrieve once per user turn, however many endpoints ask for it"""
+        metadata_filter = data.get("filter")
+        key = (
+            data.get("turn_id") or normalise_query(query),
+            K,
+            json.dumps(metadata_filter, sort_keys=True),
+        )
+        return await turns.aget_or_compute(
+            key, lambda: rag.aretrieve_context(query, k=K, filter=metadata_filter)
+        )
+
+    @app.get("/", response_class=HTMLResponse)
+    async def index():
+        # serve main chat interface
+        return templates.get_template("index.html").render()
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        data = await request.json()
+        query = data.get("message", "")
+
+        if not query:
+            return JSONResponse({"error": "no message provided"}, status_code=400)
+
+        try:
+            context_docs = await turn_context(data, query)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        async def generate():
+            async for event in rag.astream_answer(
+                query,
+                k=K,
+                context_docs=context_docs,
+                filter=data.get("filter"),
+            ):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+        return StreamingResponse(
+            generate(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/api/sources")
+    async def sources(request: Request):
+        data = await request.json()
+        query = data.get("message", "")
+
+        if not query:
+            return JSONResponse({"error": "no message provided"}, status_code=400)
+
+        try:
+            return {"sources": await turn_context(data, query)}
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+    @app.get("/api/facets")
+    async def facets():
+        return rag.retriever.vector_store.facets.values()
+
+    @app.get("/api/stats")
+    async def stats():
+        answer_cache = rag.answer_cache.stats() if rag.answer_cache is not None else {}
+        return {
+            "query_embedding_cache": rag.retriever.cache_stats(),
+            "answer_cache": answer_cache,
+            "turn_cache": turns.stats(),
+            "reranker": rag.reranker.stats() if rag.reranker is not None else {},
+        }
+
+    return app
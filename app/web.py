@@ -7,9 +7,11 @@ from flask import (
     render_template,
 )
 from flask_cors import CORS
-import time
+import json
 import logging
 from rag.llm import RAG
+from rag.turn_cache import TurnCache
+from rag.embedding_client import normalise_query
 from rag.constants import MODEL_NAME, TEMPERATURE, K
 from dotenv import load_dotenv
 
@@ -28,6 +30,21 @@ app = Flask(
 CORS(app)  # enable cors for all routes
 
 rag = RAG(model_name=MODEL_NAME, temperature=TEMPERATURE)
+turns = TurnCache()
+
+
+def turn_context(data, query):
+    """Retrieve once per user turn, however many endpoints ask for it"""
+    # clients send a turn id with both requests; otherwise fall back to the query
+    metadata_filter = data.get("filter")
+    key = (
+        data.get("turn_id") or normalise_query(query),
+        K,
+        json.dumps(metadata_filter, sort_keys=True),
+    )
+    return turns.get_or_compute(
+        key, lambda: rag.retrieve_context(query, k=K, filter=metadata_filter)
+    )
 
 
 @app.route("/")
@@ -46,20 +63,27 @@ def chat():
     if not query:
         return jsonify({"error": "no message provided"}), 400
 
-    # stream the response
-    def generate():
-        # process query with rag
-        result = rag.answer_question(query, k=K)
-
-        answer = result["answer"]
+    try:
+        context_docs = turn_context(data, query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        words = answer.split()
-        for i, word in enumerate(words):
-            suffix = " " if i < len(words) - 1 else ""
-            yield word + suffix
-            time.sleep(0.05)  # small delay to simulate streaming
+    # forward llm tokens as server-sent events as soon as they arrive,
+    # with the sources as the leading event
+    def generate():
+        for event in rag.stream_answer(
+            query,
+            k=K,
+            context_docs=context_docs,
+            filter=data.get("filter"),
+        ):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
 
-    return Response(stream_with_context(generate()), content_type="text/plain")
+    return Response(
+        stream_with_context(generate()),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/sources", methods=["POST"])
@@ -71,12 +95,34 @@ def sources():
     if not query:
         return jsonify({"error": "no message provided"}), 400
 
-    # get sources for the query
-    result = rag.answer_question(query, k=K)
-    sources = result["context"]
+    # get sources for the query; retrieval only, the answer comes from /api/chat
+    try:
+        sources = turn_context(data, query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({"sources": sources})
 
 
+@app.route("/api/facets", methods=["GET"])
+def facets():
+    # categories, sections and tags that /api/chat and /api/sources can filter on
+    return jsonify(rag.retriever.vector_store.facets.values())
+
+
+@app.route("/api/stats", methods=["GET"])
+def stats():
+    # hit rates for the query embedding and semantic answer caches
+    answer_cache = rag.answer_cache.stats() if rag.answer_cache is not None else {}
+    return jsonify(
+        {
+            "query_embedding_cache": rag.retriever.cache_stats(),
+            "answer_cache": answer_cache,
+            "turn_cache": turns.stats(),
+            "reranker": rag.reranker.stats() if rag.reranker is not None else {},
+        }
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
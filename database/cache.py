@@ -0,0 +1,90 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_cache_key(model_name, text):
+    """Content address for a (model, text) pair"""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self, path="../data/embeddings/embedding_cache.sqlite3", max_entries=100_000
+    ):
+        """Persistent embedding cache keyed by a hash of model name and text"""
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """Return {key: vector} for every key found in the cache"""
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            # query in slices to stay under sqlite's variable limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+            # touch hits so eviction keeps recently used vectors
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self.conn.commit()
+
+        return found
+
+    def put_many(self, items):
+        """Store (key, vector) pairs and evict the least recently used overflow"""
+        now = time.time()
+
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items],
+            )
+
+            count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                logger.info(f"Evicted {overflow} entries from embedding cache")
+
+            self.conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
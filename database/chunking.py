@@ -1,11 +1,37 @@
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from concurrent.futures import ProcessPoolExecutor
+from rag.facets import TAG_SEPARATOR
+from rag.tokens import count_tokens
 import json
 import os
+import re
 import uuid
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+# end of a sentence (with any closing quote/bracket) or a line break,
+# plus the whitespace after it; "0.25mg" has no space so isn't split
+SENTENCE_BOUNDARY = re.compile(r"[.!?][\"')\]]*\s+|\n\s*")
+WORD = re.compile(r"\S+\s*")
+
+
+def make_chunk_id(doc_id, chunk_index, text):
+    """Stable chunk ID that changes only when the chunk's content changes"""
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return f"{doc_id}-{chunk_index}-{content_hash}"
+
+
+def article_facets(doc):
+    """Category, section, tags and update time of an article, for its chunks"""
+    return {
+        "category": (doc.get("category") or {}).get("name", ""),
+        "section": (doc.get("section") or {}).get("name", ""),
+        "tags": TAG_SEPARATOR.join(doc.get("tags") or []),
+        "updated_at": doc.get("updated_at", ""),
+    }
+
 
 class DocumentChunker:
     def __init__(self, chunk_size=1000, chunk_overlap=200):
@@ -17,46 +43,178 @@ class DocumentChunker:
             is_separator_regex=False,
         )
 
+    def chunk_document(self, doc):
+        """Create chunk objects for a single document"""
+        doc_id = doc.get("id", str(uuid.uuid4()))
+        title = doc.get("title", "")
+        body = doc.get("body", "")
+        url = doc.get("url", "")
+
+        # combine title and body for improved document context
+        full_text = f"TITLE: {title}\n\n{body}"
+
+        # use LangChain's naive splitter to define chunks
+        chunks = self.text_splitter.split_text(full_text)
+
+        facets = article_facets(doc)
+
+        # create a chunk object for each chunk
+        doc_chunks = []
+        for i, chunk_text in enumerate(chunks):
+            chunk = {
+                "text": chunk_text,
+                "metadata": {
+                    "chunk_id": make_chunk_id(doc_id, i, chunk_text),
+                    "doc_id": doc_id,
+                    "title": title,
+                    "url": url,
+                    "chunk_index": i,
+                    "chunk_count": len(chunks),
+                    **facets,
+                },
+            }
+            doc_chunks.append(chunk)
+
+        return doc_chunks
+
     def chunk_documents(self, documents):
         """Create chunk objects for each document"""
         all_chunks = []
-
         for doc in documents:
-            doc_id = doc.get("id", str(uuid.uuid4()))
-            title = doc.get("title", "")
-            body = doc.get("body", "")
-            url = doc.get("url", "")
+            all_chunks.extend(self.chunk_document(doc))
+        return all_chunks
+
+    def save_chunks(self, chunks, output_path="../data/processed/chunks.json"):
+        """Save chunks to JSON"""
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "w") as f:
+            json.dump(chunks, f, indent=2)
+
+        logger.info(f"saved {len(chunks)} chunks to {output_path}")
+        return output_path
+
+
+def sentence_spans(text):
+    """(start, end) offsets of each sentence or line, trailing whitespace included"""
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        yield start, match.end()
+        start = match.end()
+    if start < len(text):
+        yield start, len(text)
+
+
+class SentenceChunker(DocumentChunker):
+    def __init__(
+        self,
+        chunk_tokens=256,
+        chunk_overlap=48,
+        workers=None,
+        length_function=count_tokens,
+    ):
+        """Pack whole sentences into chunks of at most chunk_tokens tokens
+
+        Documents are split by offsets into the source text, and only the
+        final chunks are sliced out; overlap is whole trailing sentences.
+        """
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.workers = workers  # processes for chunk_documents; None = serial
+        self.length_function = length_function
+
+    def _units(self, text):
+        """(start, end, tokens) per sentence, falling back to words if too long"""
+        units = []
+        for start, end in sentence_spans(text):
+            tokens = self.length_function(text[start:end])
+            if tokens <= self.chunk_tokens:
+                units.append((start, end, tokens))
+                continue
+            for word in WORD.finditer(text, start, end):
+                units.append(
+                    (word.start(), word.end(), self.length_function(word.group()))
+                )
+        return units
+
+    def split_spans(self, text):
+        """(start, end) offsets of each chunk of text"""
+        units = self._units(text)
+        spans = []
+        first = 0
+        while first < len(units):
+            # take sentences until the next one would overflow the chunk
+            last, total = first, 0
+            while last < len(units) and (
+                last == first or total + units[last][2] <= self.chunk_tokens
+            ):
+                total += units[last][2]
+                last += 1
+            spans.append((units[first][0], units[last - 1][1]))
+            if last == len(units):
+                break
+
+            # start the next chunk on the trailing sentences that fit the overlap
+            next_first, overlap = last, 0
+            while (
+                next_first - 1 > first
+                and overlap + units[next_first - 1][2] <= self.chunk_overlap
+            ):
+                next_first -= 1
+                overlap += units[next_first][2]
+            first = next_first
+        return spans
 
-            # combine title and body for improved document context
-            full_text = f"TITLE: {title}\n\n{body}"
+    def chunk_document(self, doc):
+        """Create chunk objects for a single document"""
+        doc_id = doc.get("id", str(uuid.uuid4()))
+        title = doc.get("title", "")
+        full_text = f"TITLE: {title}\n\n{doc.get('body', '')}"
 
-            # use LangChain's naive splitter to define chunks
-            chunks = self.text_splitter.split_text(full_text)
+        facets = article_facets(doc)
 
-            # create a chunk object for each chunk
-            for i, chunk_text in enumerate(chunks):
-                chunk = {
+        doc_chunks = []
+        for start, end in self.split_spans(full_text):
+            chunk_text = full_text[start:end].rstrip()
+            i = len(doc_chunks)
+            doc_chunks.append(
+                {
                     "text": chunk_text,
                     "metadata": {
+                        "chunk_id": make_chunk_id(doc_id, i, chunk_text),
                         "doc_id": doc_id,
                         "title": title,
-                        "url": url,
+                        "url": doc.get("url", ""),
                         "chunk_index": i,
-                        "chunk_count": len(chunks),
+                        # offsets into "TITLE: <title>\n\n<body>"
+                        "start": start,
+                        "end": start + len(chunk_text),
+                        **facets,
                     },
                 }
-                all_chunks.append(chunk)
+            )
+        return doc_chunks
 
+    def chunk_documents(self, documents):
+        """Create chunk objects for each document, across processes if enabled"""
+        if not self.workers or self.workers < 2 or len(documents) < 2:
+            return super().chunk_documents(documents)
+
+        # big batches keep pickling overhead small relative to the work
+        batch = max(1, len(documents) // (self.workers * 8))
+        all_chunks = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for doc_chunks in pool.map(self.chunk_document, documents, chunksize=batch):
+                all_chunks.extend(doc_chunks)
         return all_chunks
 
-    def save_chunks(self, chunks, output_path="../data/processed/chunks.json"):
-        """Save chunks to JSON"""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(chunks, f, indent=2)
 
-        logger.info(f"saved {len(chunks)} chunks to {output_path}")
-        return output_path
+def make_chunker(kind, chunk_size, chunk_overlap, chunk_tokens, chunk_overlap_tokens):
+    """Chunker for a CHUNKER setting: "recursive" (characters) or "sentence" (tokens)"""
+    if kind == "recursive":
+        return DocumentChunker(chunk_size, chunk_overlap)
+    if kind == "sentence":
+        return SentenceChunker(chunk_tokens, chunk_overlap_tokens, os.cpu_count())
+    raise ValueError(f"Unknown chunker: {kind}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def metadata_path(vectors_path):
+    """Sidecar path holding chunk text and metadata for a vector file"""
+    root, _ = os.path.splitext(vectors_path)
+    return f"{root}.meta.json"
+
+
+class EmbeddingStore:
+    def __init__(self, vectors, records, model_name=None):
+        """Embedding matrix plus the chunk records its rows belong to"""
+        self.vectors = vectors  # (n, dim) array, memory-mapped when loaded
+        self.records = records  # [{"text": ..., "metadata": ...}, ...]
+        self.model_name = model_name
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    def chunks(self):
+        """Yield chunk dicts in the same shape the JSON file used"""
+        for record, vector in zip(self.records, self.vectors):
+            chunk = {
+                "text": record["text"],
+                "metadata": record["metadata"],
+                # float16 stores are widened back for consumers like Chroma
+                "embedding": vector.astype(np.float32, copy=False),
+            }
+            if self.model_name is not None:
+                chunk["embedding_model"] = self.model_name
+            yield chunk
+
+    @classmethod
+    def from_chunks(cls, chunks, model_name=None, dtype="float32"):
+        """Build a store from chunk dicts carrying an "embedding" list"""
+        vectors = np.asarray([chunk["embedding"] for chunk in chunks], dtype=dtype)
+        records = [{"text": c["text"], "metadata": c["metadata"]} for c in chunks]
+        if model_name is None and chunks:
+            model_name = chunks[0].get("embedding_model")
+        return cls(vectors, records, model_name)
+
+    def save(self, vectors_path):
+        """Write the matrix as .npy and the records as a compact JSON sidecar"""
+        os.makedirs(os.path.dirname(os.path.abspath(vectors_path)), exist_ok=True)
+        np.save(vectors_path, np.ascontiguousarray(self.vectors))
+
+        header = {
+            "model": self.model_name,
+            "dtype": str(self.vectors.dtype),
+            "dim": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "count": len(self.records),
+            "chunks": self.records,
+        }
+        with open(metadata_path(vectors_path), "w") as f:
+            json.dump(header, f, separators=(",", ":"))
+
+        logger.info(f"Saved {len(self.records)} embeddings to {vectors_path}")
+        return vectors_path
+
+    @classmethod
+    def load(cls, vectors_path, mmap=True):
+        """Load a store; with mmap the matrix is a zero-copy view of the file"""
+        vectors = np.load(vectors_path, mmap_mode="r" if mmap else None)
+        with open(metadata_path(vectors_path), "r") as f:
+            header = json.load(f)
+
+        if len(header["chunks"]) != vectors.shape[0]:
+            raise ValueError(
+                f"{vectors_path} has {vectors.shape[0]} rows but "
+                f"{len(header['chunks'])} metadata records"
+            )
+        return cls(vectors, header["chunks"], header.get("model"))
+
+
+def convert_json_to_store(json_path, vectors_path, dtype="float32", model_name=None):
+    """Convert a chunks_with_embeddings.json file to the binary format"""
+    with open(json_path, "r") as f:
+        chunks = json.load(f)
+    store = EmbeddingStore.from_chunks(chunks, model_name=model_name, dtype=dtype)
+    store.save(vectors_path)
+    return store
@@ -1,7 +1,11 @@
 import json
 import os
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from langchain_openai import OpenAIEmbeddings
+from database.cache import embedding_cache_key
+from database.embedding_store import EmbeddingStore
 from dotenv import load_dotenv
 
 
@@ -9,30 +13,166 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+CHARS_PER_TOKEN = 4  # rough estimate used to size batches without a tokeniser
+
+
+def estimate_tokens(text):
+    """Cheap token estimate for batch sizing"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def make_batches(texts, batch_size=64, max_batch_tokens=8000):
+    """Group texts into batches bounded by count and estimated tokens"""
+    batches = []
+    batch = []
+    batch_tokens = 0
+
+    for idx, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+
+        # close the current batch if this text would overflow either limit
+        if batch and (
+            len(batch) >= batch_size or batch_tokens + tokens > max_batch_tokens
+        ):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+
+        batch.append(idx)
+        batch_tokens += tokens
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
 
 class Embeddings:
-    def __init__(self, model_name="text-embedding-3-small"):
+    def __init__(
+        self,
+        model_name="text-embedding-3-small",
+        embedding_model=None,
+        batch_size=64,
+        max_batch_tokens=8000,
+        max_workers=4,
+        max_retries=3,
+        cache=None,
+    ):
         """Initialise the embedding model"""
-        self.embedding_model = OpenAIEmbeddings(model=model_name)
+        self.model_name = model_name
+        # any LangChain-style embeddings object works here, e.g. a local fake
+        if embedding_model is None:
+            embedding_model = OpenAIEmbeddings(model=model_name)
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+
+        # optional EmbeddingCache, consulted before calling the model
+        self.cache = cache
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def embed_text(self, text):
         """Embed a single text string"""
         return self.embedding_model.embed_query(text)
 
+    def _embed_batch(self, texts):
+        """Embed one batch, retrying with exponential backoff"""
+        retry_count = 0
+        backoff_time = 1.0
+
+        while True:
+            try:
+                return self.embedding_model.embed_documents(texts)
+            except Exception as e:
+                retry_count += 1
+
+                if retry_count > self.max_retries:
+                    logger.error(
+                        f"Failed to embed batch of {len(texts)} after {self.max_retries} attempts: {str(e)}"
+                    )
+                    raise
+
+                logger.warning(
+                    f"Embedding batch failed, retrying in {backoff_time:.1f}s (Attempt {retry_count}/{self.max_retries})"
+                )
+                time.sleep(backoff_time)
+                backoff_time *= 2
+
+    def embed_texts(self, texts):
+        """Embed many texts, serving what we can from the cache"""
+        if not texts:
+            return []
+
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # only send new or changed texts to the model, once per unique key
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        hits = len(texts) - sum(1 for key in keys if key not in cached)
+        self.cache_hits += hits
+        self.cache_misses += len(texts) - hits
+        logger.info(
+            f"Embedding cache: {hits} hits, {len(texts) - hits} misses ({len(missing)} to embed)"
+        )
+
+        if missing:
+            new_vectors = self._embed_uncached(list(missing.values()))
+            fresh = list(zip(missing.keys(), new_vectors))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def _embed_uncached(self, texts):
+        """Embed many texts in concurrent batches, preserving input order"""
+        batches = make_batches(texts, self.batch_size, self.max_batch_tokens)
+        logger.info(
+            f"Embedding {len(texts)} texts in {len(batches)} batches ({self.max_workers} workers)"
+        )
+
+        vectors = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # map yields results in submission order, so output stays deterministic
+            results = executor.map(
+                lambda batch: self._embed_batch([texts[i] for i in batch]), batches
+            )
+            for batch, batch_vectors in zip(batches, results):
+                for idx, vector in zip(batch, batch_vectors):
+                    vectors[idx] = vector
+
+        return vectors
+
     def create_embeddings_for_chunks(
         self, chunks, output_path="../data/embeddings/chunks_with_embeddings.json"
     ):
-        """Create and save embeddings for each chunk to JSON file"""
+        """Create and save embeddings for each chunk to JSON or .npy file"""
         logger.info(f"Creating embeddings for {len(chunks)} chunks")
 
         # create embedding column for each chunk
-        for chunk in chunks:
-            chunk["embedding"] = self.embed_text(chunk["text"])
+        vectors = self.embed_texts([chunk["text"] for chunk in chunks])
+        for chunk, vector in zip(chunks, vectors):
+            chunk["embedding"] = vector
+            chunk["embedding_model"] = self.model_name
 
-        # save embeddings to JSON
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, "w") as f:
-            json.dump(chunks, f, indent=2)
+        # a .npy path gets the compact binary store, anything else stays JSON
+        if output_path.endswith(".npy"):
+            EmbeddingStore.from_chunks(chunks, model_name=self.model_name).save(
+                output_path
+            )
+        else:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w") as f:
+                json.dump(chunks, f, indent=2)
 
         logger.info(f"Created and saved embeddings for {len(chunks)} chunks")
         return chunks
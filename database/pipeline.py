@@ -0,0 +1,236 @@
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+
+class StageMetrics:
+    def __init__(self, name):
+        """Counters for one pipeline stage"""
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0  # time spent doing this stage's work
+        self.wait_seconds = 0.0  # time blocked waiting for input
+        self.wall_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_seconds": self.busy_seconds,
+            "wait_seconds": self.wait_seconds,
+            "wall_seconds": self.wall_seconds,
+            "items_per_sec": (
+                self.items_in / self.wall_seconds if self.wall_seconds else 0.0
+            ),
+        }
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        api,
+        chunker,
+        embedder,
+        vector_store,
+        queue_size=64,
+        batch_size=64,
+        save_raw=False,
+        raw_dir="../data/raw",
+    ):
+        """Streaming fetch -> clean -> chunk -> embed -> upsert ingest"""
+        self.api = api
+        self.chunker = chunker
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.queue_size = queue_size  # bounds memory between stages
+        self.batch_size = batch_size
+        self.save_raw = save_raw
+        self.raw_dir = raw_dir
+
+        self._stop = threading.Event()
+        self._errors = []
+        self.metrics = {}
+
+    def _put(self, q, item):
+        """Block on a full queue, but give up (returning False) if a stage failed"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stage(self, name, source, work, out_queue):
+        """Run one stage: pull from source, apply work, push outputs downstream"""
+        metrics = self.metrics[name]
+        start = time.perf_counter()
+        source = iter(source)
+        try:
+            # once any stage fails, stop pulling more work (e.g. Zendesk pages)
+            while not self._stop.is_set():
+                wait_start = time.perf_counter()
+                item = next(source, _DONE)
+                metrics.wait_seconds += time.perf_counter() - wait_start
+                if item is _DONE:
+                    break
+
+                metrics.items_in += 1
+                busy_start = time.perf_counter()
+                outputs = work(item)
+                metrics.busy_seconds += time.perf_counter() - busy_start
+
+                for output in outputs:
+                    if not self._put(out_queue, output):
+                        break
+                    metrics.items_out += 1
+        except Exception as e:
+            logger.error(f"Pipeline stage {name} failed: {str(e)}")
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            metrics.wall_seconds = time.perf_counter() - start
+            if out_queue is not None:
+                self._put(out_queue, _DONE)
+
+    def _drain(self, q):
+        """Yield items from a queue until the upstream stage finishes"""
+        while True:
+            item = self._get(q)
+            if item is _DONE:
+                return
+            yield item
+
+    def _batched(self, items):
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self):
+        """Run every stage concurrently and return per-stage metrics"""
+        stored_metadata = self.vector_store.get_stored_metadata()
+        stored_ids = set(stored_metadata)
+        seen_ids = set()
+        retagged = []
+        upserted = [0]
+
+        raw_q = queue.Queue(self.queue_size)
+        article_q = queue.Queue(self.queue_size)
+        chunk_q = queue.Queue(self.queue_size)
+        embedded_q = queue.Queue(self.queue_size)
+
+        def fetch(raw):
+            return [raw]
+
+        def clean(raw):
+            article, article_meta = raw
+            return [self.api.process_article(article, article_meta)]
+
+        def chunk(article):
+            chunks = self.chunker.chunk_document(article)
+            fresh = []
+            for c in chunks:
+                chunk_id = self.vector_store.chunk_id(c)
+                seen_ids.add(chunk_id)
+                # unchanged chunks are already stored, so skip embedding them
+                if chunk_id not in stored_ids:
+                    fresh.append(c)
+                elif stored_metadata[chunk_id] != c["metadata"]:
+                    # same text, but the article's category/section/tags changed
+                    retagged.append(c)
+            return fresh
+
+        def embed(batch):
+            vectors = self.embedder.embed_texts([c["text"] for c in batch])
+            for c, vector in zip(batch, vectors):
+                c["embedding"] = vector
+                c["embedding_model"] = self.embedder.model_name
+            return [batch]
+
+        def upsert(batch):
+            # the index is saved once at the end, not after every batch
+            self.vector_store.add_embeddings(batch, flush=False)
+            upserted[0] += len(batch)
+            return []
+
+        raw_articles = self.api.iter_raw_articles(self.save_raw, self.raw_dir)
+        stages = [
+            ("fetch", raw_articles, fetch, raw_q),
+            ("clean", self._drain(raw_q), clean, article_q),
+            ("chunk", self._drain(article_q), chunk, chunk_q),
+            ("embed", self._batched(self._drain(chunk_q)), embed, embedded_q),
+            ("upsert", self._drain(embedded_q), upsert, None),
+        ]
+
+        self.metrics = {name: StageMetrics(name) for name, _, _, _ in stages}
+        start = time.perf_counter()
+
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=stage,
+                name=f"ingest-{stage[0]}",
+                daemon=True,
+            )
+            for stage in stages
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            # keep the batches that were upserted before the failure
+            self.vector_store.flush()
+            raise self._errors[0]
+
+        # anything stored that we didn't see this run has been removed upstream
+        stale = stored_ids - seen_ids
+        if stale:
+            self.vector_store.delete_ids(stale, flush=False)
+        if retagged:
+            self.vector_store.update_metadata(retagged, flush=False)
+        self.vector_store.flush()
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            "seconds": elapsed,
+            "chunks_seen": len(seen_ids),
+            "chunks_upserted": upserted[0],
+            "chunks_deleted": len(stale),
+            "chunks_retagged": len(retagged),
+            "stages": [m.as_dict() for m in self.metrics.values()],
+        }
+
+        for m in summary["stages"]:
+            logger.info(
+                f"Stage {m['stage']}: {m['items_in']} in, {m['items_out']} out, "
+                f"{m['busy_seconds']:.2f}s busy, {m['wait_seconds']:.2f}s waiting, "
+                f"{m['items_per_sec']:.1f} items/s"
+            )
+        logger.info(
+            f"Ingest complete in {elapsed:.2f}s - {summary['chunks_seen']} chunks seen, "
+            f"{summary['chunks_upserted']} upserted, {summary['chunks_deleted']} deleted, "
+            f"{summary['chunks_retagged']} retagged"
+        )
+        return summary
@@ -42,11 +42,11 @@ document.addEventListener('DOMContentLoaded', () => {
         // store in history
         chatHistory.push({ role: 'user', content: message });
         
-        // fetch streaming response
-        fetchStreamingResponse(message, messageContent, assistantMessageDiv);
+        // the turn id lets /api/sources reuse this turn's retrieval if it's called too
+        const turnId = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random()}`;
         
-        // fetch sources
-        fetchSources(message);
+        // fetch streaming response; sources arrive as its first event
+        fetchStreamingResponse(message, turnId, messageContent, assistantMessageDiv);
     }
     
     function addMessage(role, content) {
@@ -66,7 +66,7 @@ document.addEventListener('DOMContentLoaded', () => {
         return messageContent; // return the content element for updating later
     }
     
-    async function fetchStreamingResponse(message, messageElement, messageDiv) {
+    async function fetchStreamingResponse(message, turnId, messageElement, messageDiv) {
         try {
             const response = await fetch('/api/chat', {
                 method: 'POST',
@@ -75,6 +75,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 },
                 body: JSON.stringify({
                     message: message,
+                    turn_id: turnId,
                     history: chatHistory
                 })
             });
@@ -86,23 +87,38 @@ document.addEventListener('DOMContentLoaded', () => {
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
             let assistantResponse = '';
-            
-            // when we get the first chunk, remove loading indicator
-            messageDiv.classList.remove('loading');
+            let buffer = '';
             
             while (true) {
                 const { value, done } = await reader.read();
                 if (done) break;
                 
-                // decode the chunk and append to assistant response
-                const chunk = decoder.decode(value, { stream: true });
-                assistantResponse += chunk;
-                messageElement.textContent = assistantResponse;
+                // server-sent events are separated by a blank line
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
                 
-                // scroll to bottom as new content arrives
-                chatMessages.scrollTop = chatMessages.scrollHeight;
+                for (const event of events) {
+                    const dataLine = event.split('\n').find(line => line.startsWith('data: '));
+                    if (!dataLine) continue;
+                    const data = JSON.parse(dataLine.slice(6));
+                    
+                    if (data.type === 'sources') {
+                        renderSources(data.sources);
+                    } else if (data.type === 'token') {
+                        // when we get the first token, remove loading indicator
+                        messageDiv.classList.remove('loading');
+                        assistantResponse += data.content;
+                        messageElement.textContent = assistantResponse;
+                        
+                        // scroll to bottom as new content arrives
+                        chatMessages.scrollTop = chatMessages.scrollHeight;
+                    }
+                }
             }
             
+            messageDiv.classList.remove('loading');
+            
             // add the completed response to chat history
             chatHistory.push({ role: 'assistant', content: assistantResponse });
             
@@ -113,31 +129,15 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
-    async function fetchSources(message) {
+    function renderSources(sources) {
         try {
-            const response = await fetch('/api/sources', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    message: message
-                })
-            });
-            
-            if (!response.ok) {
-                throw new Error('network response was not ok');
-            }
-            
-            const data = await response.json();
-            
             // display sources
-            if (data.sources && data.sources.length > 0) {
+            if (sources && sources.length > 0) {
                 // clear previous sources
                 sourcesList.innerHTML = '';
                 
                 // add each source
-                data.sources.forEach(source => {
+                sources.forEach(source => {
                     const sourceItem = document.createElement('div');
                     sourceItem.className = 'source-item';
                     
@@ -161,7 +161,7 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             
         } catch (error) {
-            console.error('error fetching sources:', error);
+            console.error('error displaying sources:', error);
             sourcesContainer.style.display = 'none';
         }
     }
@@ -0,0 +1,115 @@
+from rag.constants import ANSWER_CACHE_SIZE, ANSWER_CACHE_THRESHOLD
+from rag.numpy_index import normalise_rows
+from collections import OrderedDict
+import copy
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def answer_cache_key(scope, context_ids):
+    """Answers depend only on the scope (model, prompt, k) and the chunks shown"""
+    return (scope, tuple(context_ids))
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, max_entries=ANSWER_CACHE_SIZE):
+        """Reuse answers for near-duplicate queries that retrieved the same chunks"""
+        self.threshold = threshold  # cosine similarity needed to count as a repeat
+        self.max_entries = max_entries
+        self.index_version = None
+        self.hits = 0
+        self.misses = 0
+
+        self._queries = OrderedDict()  # query id -> (unit vector, answer key), LRU
+        self._answers = {}  # answer key -> result dict
+        self._next_id = 0
+        self._matrix = None  # stacked query vectors, rebuilt after changes
+        self._matrix_ids = []
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._queries)
+
+    def _check_version(self, index_version):
+        # a rebuilt index can change what every cached answer was based on
+        if index_version != self.index_version:
+            if self._queries:
+                logger.info("Vector index changed, clearing answer cache")
+            self._queries.clear()
+            self._answers.clear()
+            self._matrix = None
+            self.index_version = index_version
+
+    def _nearest(self, vector, key):
+        if key not in self._answers:
+            return None, 0.0
+        if self._matrix is None:
+            self._matrix_ids = list(self._queries)
+            self._matrix = np.vstack([v for v, _ in self._queries.values()])
+            self._matrix_keys = [k for _, k in self._queries.values()]
+        similarities = self._matrix @ vector
+        # only answers generated under the same scope from the same chunks count
+        mismatched = [i for i, k in enumerate(self._matrix_keys) if k != key]
+        similarities[mismatched] = -np.inf
+        best = int(np.argmax(similarities))
+        return self._matrix_ids[best], float(similarities[best])
+
+    def lookup(self, query_embedding, key, index_version=None):
+        """Cached result for the closest previous query with this key, if similar enough
+
+        key is answer_cache_key(scope, context_ids), so a hit was answered
+        from exactly the chunks this query retrieved.
+        """
+        vector = normalise_rows(query_embedding)[0]
+        with self._lock:
+            self._check_version(index_version)
+            query_id, similarity = self._nearest(vector, key)
+            if query_id is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+
+            self._queries.move_to_end(query_id)
+            self.hits += 1
+            return copy.deepcopy(self._answers[key])
+
+    def store(self, query_embedding, key, result, index_version=None):
+        """Remember a generated answer under its context key"""
+        vector = normalise_rows(query_embedding)[0]
+        with self._lock:
+            self._check_version(index_version)
+            self._queries[self._next_id] = (vector, key)
+            self._answers[key] = copy.deepcopy(result)
+            self._next_id += 1
+
+            while len(self._queries) > self.max_entries:
+                _, (_, evicted) = self._queries.popitem(last=False)
+                # drop the answer once no remembered query points at it
+                if all(k != evicted for _, k in self._queries.values()):
+                    self._answers.pop(evicted, None)
+            self._matrix = None
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hit_rate,
+                "queries": len(self._queries),
+                "answers": len(self._answers),
+                "threshold": self.threshold,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
+            self._answers.clear()
+            self._matrix = None
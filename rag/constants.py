@@ -4,8 +4,36 @@ MODEL_NAME = "gpt-4o"
 
 # RAG
 K = 6  # number of chunks to retrieve
+VECTOR_BACKEND = "chroma"  # "chroma", "numpy" (exact) or "ivf" (approximate)
+ANN_LISTS = None  # IVF clusters; None uses ~sqrt(corpus size)
+ANN_PROBES = 8  # IVF clusters searched per query: higher = better recall, slower
+QUERY_CACHE_SIZE = 1024  # query embeddings kept in memory
+QUERY_CACHE_TTL = 3600  # seconds before a cached query embedding expires
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_THRESHOLD = 0.9  # query cosine similarity needed to reuse an answer
+TURN_CACHE_TTL = 120  # seconds /api/chat and /api/sources share a turn's retrieval
+ANSWER_CACHE_SIZE = 512  # remembered queries before the least recent is evicted
+LEXICAL_WEIGHT = 0.5  # BM25 weight in hybrid fusion, relative to dense; 0 disables
+HYBRID_CANDIDATES = 20  # results taken from each of BM25 and dense before fusion
+RRF_K = 60  # reciprocal rank fusion damping: higher flattens rank differences
+RERANK_ENABLED = False  # needs sentence-transformers installed
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"  # small enough for CPU
+RERANK_CANDIDATES = 20  # chunks fetched for the reranker to choose K from
+RERANK_BATCH_SIZE = 32  # (query, chunk) pairs per reranker forward pass
+CONTEXT_TOKEN_BUDGET = 3000  # prompt tokens for retrieved context; None = unlimited
+BATCH_CONCURRENCY = 8  # LLM calls in flight at once for RAG.answer_batch
 
 # processing
+CHUNKER = "recursive"  # "recursive" (characters) or "sentence" (tokens)
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
+CHUNK_TOKENS = 256  # sentence chunker: max tokens per chunk
+CHUNK_OVERLAP_TOKENS = 48  # sentence chunker: whole sentences repeated, up to this
 EMBEDDING_MODEL = "text-embedding-3-small"
+
+# known output dimensions, used to validate precomputed vectors before ingest
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
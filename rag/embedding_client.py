@@ -0,0 +1,134 @@
+from langchain_core.embeddings import Embeddings as BaseEmbeddings
+from langchain_openai import OpenAIEmbeddings
+from rag.constants import EMBEDDING_MODEL, QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+from collections import OrderedDict
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def normalise_query(text):
+    """Canonical form used as the cache key, so trivial variants share an entry"""
+    return " ".join(text.lower().split())
+
+
+class CachedQueryEmbeddings(BaseEmbeddings):
+    def __init__(
+        self,
+        embeddings,
+        model_name=EMBEDDING_MODEL,
+        max_entries=QUERY_CACHE_SIZE,
+        ttl_seconds=QUERY_CACHE_TTL,
+    ):
+        """Wrap an embeddings client with an in-memory LRU/TTL query cache"""
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds  # None keeps entries until evicted
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # (model, query) -> (vector, stored_at)
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                vector, stored_at = entry
+                if (
+                    self.ttl_seconds is None
+                    or time.monotonic() - stored_at < self.ttl_seconds
+                ):
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._cache[key]
+            self.misses += 1
+            return None
+
+    def _store(self, key, vector):
+        with self._lock:
+            self._cache[key] = (vector, time.monotonic())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text):
+        """Embed a query, reusing the vector for repeat questions"""
+        key = (self.model_name, normalise_query(text))
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        """Async embed_query, sharing the same cache"""
+        key = (self.model_name, normalise_query(text))
+        vector = self._lookup(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._store(key, vector)
+        return vector
+
+    def embed_queries(self, texts):
+        """Embed many queries, sending only the uncached ones in a single request"""
+        keys = [(self.model_name, normalise_query(text)) for text in texts]
+        vectors = [self._lookup(key) for key in keys]
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = dict(
+                zip(missing, self.embeddings.embed_documents(list(missing.values())))
+            )
+            for key, vector in fresh.items():
+                self._store(key, vector)
+            vectors = [fresh.get(key, vector) for key, vector in zip(keys, vectors)]
+        return vectors
+
+    def embed_documents(self, texts):
+        # document embeddings are one-off, so they go straight to the client
+        return self.embeddings.embed_documents(texts)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            size = len(self._cache)
+        return {
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size": size,
+            "max_entries": self.max_entries,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def get_embedding_client(model_name=EMBEDDING_MODEL):
+    """Process-wide cached embedding client, created once per model"""
+    with _clients_lock:
+        client = _clients.get(model_name)
+        if client is None:
+            client = CachedQueryEmbeddings(
+                OpenAIEmbeddings(model=model_name), model_name=model_name
+            )
+            _clients[model_name] = client
+            logger.info(f"Created shared embedding client for {model_name}")
+        return client
@@ -0,0 +1,87 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FACETS = ("category", "section", "tags")
+TAG_SEPARATOR = ","  # tags are joined into one string, as Chroma metadata is scalar
+
+
+def facet_values(metadata, facet):
+    """Values a chunk has for a facet; tags can have several"""
+    value = metadata.get(facet)
+    if not value:
+        return []
+    if facet == "tags":
+        return [tag for tag in value.split(TAG_SEPARATOR) if tag]
+    return [value]
+
+
+def valid_filter_value(facet, wanted):
+    """A string, or for facets a list of strings"""
+    if isinstance(wanted, str):
+        return True
+    return (
+        facet != "updated_after"
+        and isinstance(wanted, list)
+        and all(isinstance(value, str) for value in wanted)
+    )
+
+
+class FacetIndex:
+    def __init__(self, metadatas):
+        """Precomputed row sets per category, section and tag, for filtered search
+
+        Rows are positions in the order metadatas were given, which is the
+        store's row order, so a filter resolves to rows without a scan.
+        """
+        postings = {facet: {} for facet in FACETS}
+        for row, metadata in enumerate(metadatas):
+            for facet in FACETS:
+                for value in facet_values(metadata, facet):
+                    postings[facet].setdefault(value, []).append(row)
+        self.rows = {
+            facet: {
+                value: np.array(rows, dtype=np.int64) for value, rows in values.items()
+            }
+            for facet, values in postings.items()
+        }
+
+        # updated_at is ISO 8601, so sorting the strings sorts by time
+        updated = np.array([m.get("updated_at") or "" for m in metadatas], dtype=str)
+        self._updated_order = np.argsort(updated, kind="stable")
+        self._updated_sorted = updated[self._updated_order]
+
+    def values(self):
+        """Every value of each facet, e.g. to offer as filter options"""
+        return {facet: sorted(values) for facet, values in self.rows.items()}
+
+    def select(self, filter):
+        """Sorted rows matching every facet in filter, or None for no filter
+
+        filter maps a facet to a value or a list of values (any may match),
+        plus optionally "updated_after" with an ISO 8601 timestamp.
+        """
+        if not filter:
+            return None
+        if not isinstance(filter, dict):
+            raise ValueError("Filter must be an object mapping fields to values")
+
+        selected = None
+        for facet, wanted in filter.items():
+            if facet != "updated_after" and facet not in FACETS:
+                raise ValueError(f"Unknown filter field: {facet}")
+            if not valid_filter_value(facet, wanted):
+                raise ValueError(
+                    f"Filter {facet} must be a string"
+                    + ("" if facet == "updated_after" else " or a list of strings")
+                )
+            if facet == "updated_after":
+                start = np.searchsorted(self._updated_sorted, wanted, side="left")
+                rows = np.sort(self._updated_order[start:])
+            else:
+                wanted = [wanted] if isinstance(wanted, str) else wanted
+                found = [self.rows[facet][v] for v in wanted if v in self.rows[facet]]
+                rows = np.unique(np.concatenate(found)) if found else np.empty(0, int)
+            selected = rows if selected is None else np.intersect1d(selected, rows)
+        return selected
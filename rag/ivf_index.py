@@ -0,0 +1,177 @@
+from rag.numpy_index import NumpyIndex, normalise_rows, top_k
+from database.embedding_store import EmbeddingStore
+import os
+import math
+import hashlib
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def ivf_path(vectors_path):
+    """Sidecar path holding the IVF centroids and list assignments"""
+    root, _ = os.path.splitext(vectors_path)
+    return f"{root}.ivf.npz"
+
+
+def spherical_kmeans(vectors, n_clusters, n_iter=10, seed=0):
+    """k-means on unit vectors, using cosine similarity for assignment"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+
+        # sum members per cluster with one (clusters x n) @ (n x dim) product
+        one_hot = np.zeros((n_clusters, len(vectors)), dtype=np.float32)
+        one_hot[assignments, np.arange(len(vectors))] = 1.0
+        sums = one_hot @ vectors
+        counts = np.bincount(assignments, minlength=n_clusters)
+
+        occupied = counts > 0
+        centroids[occupied] = sums[occupied]
+        # re-seed empty clusters so every list stays useful
+        empty = np.flatnonzero(~occupied)
+        centroids[empty] = vectors[rng.integers(len(vectors), size=len(empty))]
+        centroids = normalise_rows(centroids)
+
+    return centroids
+
+
+class IVFIndex(NumpyIndex):
+    def __init__(self, embedding_function=None, dim=None, n_lists=None, n_probe=8):
+        """Inverted-file ANN index: search only the n_probe closest clusters"""
+        super().__init__(embedding_function, dim)
+        self.n_lists = n_lists  # None picks ~sqrt(n) at training time
+        self.n_probe = n_probe  # more probes = better recall, higher latency
+        self.centroids = None
+        self.assignments = np.empty(0, dtype=np.int32)
+        self._list_order = None  # rows sorted by list, rebuilt lazily
+        self._list_offsets = None
+
+    def _fingerprint(self):
+        """Hash of row IDs in order, to tell if saved lists still apply"""
+        return hashlib.sha256("\n".join(map(str, self.ids)).encode()).hexdigest()
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, n_iter=10, max_train=20_000, seed=0):
+        """Cluster the current vectors into n_lists inverted lists"""
+        n = len(self.ids)
+        n_lists = self.n_lists or max(1, int(math.sqrt(n)))
+        n_lists = min(n_lists, n)
+        if n_lists == 0:
+            return
+
+        # train on a sample; assignment afterwards covers every row
+        rng = np.random.default_rng(seed)
+        sample = self.vectors
+        if n > max_train:
+            sample = self.vectors[rng.choice(n, max_train, replace=False)]
+
+        self.centroids = spherical_kmeans(sample, n_lists, n_iter, seed)
+        self.assignments = self._assign(self.vectors)
+        self._list_order = None
+        logger.info(f"Trained IVF index with {n_lists} lists over {n} vectors")
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _lists(self):
+        """Rows grouped by inverted list, as (order, offsets) arrays"""
+        if self._list_order is None:
+            self._list_order = np.argsort(self.assignments, kind="stable")
+            counts = np.bincount(self.assignments, minlength=len(self.centroids))
+            self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self._list_order, self._list_offsets
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        """Insert rows and drop them straight into their nearest list"""
+        super().upsert(ids, embeddings, documents, metadatas)
+        if not self.is_trained:
+            return
+
+        missing = len(self.ids) - len(self.assignments)
+        if missing > 0:
+            self.assignments = np.concatenate(
+                [self.assignments, np.zeros(missing, dtype=np.int32)]
+            )
+        rows = np.array([self._positions[chunk_id] for chunk_id in ids])
+        self.assignments[rows] = self._assign(self.vectors[rows])
+        self._list_order = None
+
+    def delete(self, ids):
+        if self.is_trained:
+            drop = {self._positions[i] for i in ids if i in self._positions}
+            keep = [row for row in range(len(self.ids)) if row not in drop]
+            self.assignments = self.assignments[keep]
+            self._list_order = None
+        super().delete(ids)
+
+    def search_by_vectors(self, query_vectors, k=3, n_probe=None, rows=None):
+        """Approximate top-k, scoring only rows in the probed lists"""
+        if rows is not None:
+            # a filtered subset is small enough to scan exactly, and probing
+            # could miss it entirely
+            return super().search_by_vectors(query_vectors, k, rows=rows)
+        if not self.is_trained and len(self.ids) > 0:
+            self.train()
+        if not self.is_trained:
+            return super().search_by_vectors(query_vectors, k)
+
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        queries = normalise_rows(query_vectors)
+        order, offsets = self._lists()
+        probes = top_k(queries @ self.centroids.T, n_probe)
+
+        all_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate(
+                [order[offsets[c] : offsets[c + 1]] for c in lists]
+            )
+            scores = self.vectors[candidates] @ query
+            best = top_k(scores[None, :], k)[0]
+            all_rows[i, : len(best)] = candidates[best]
+            all_scores[i, : len(best)] = scores[best]
+
+        return all_rows, all_scores
+
+    def _to_results(self, rows, similarities):
+        # probed lists can hold fewer than k rows; drop the padding
+        valid = rows >= 0
+        return super()._to_results(rows[valid], similarities[valid])
+
+    @classmethod
+    def from_store(cls, store, embedding_function=None, n_lists=None, n_probe=8):
+        index = super().from_store(store, embedding_function)
+        index.n_lists = n_lists
+        index.n_probe = n_probe
+        return index
+
+    @classmethod
+    def load(cls, path, embedding_function=None, n_lists=None, n_probe=8):
+        """Load vectors and, if present and current, the trained lists"""
+        index = cls.from_store(
+            EmbeddingStore.load(path), embedding_function, n_lists, n_probe
+        )
+        sidecar = ivf_path(path)
+        if os.path.exists(sidecar):
+            saved = np.load(sidecar)
+            if str(saved["fingerprint"]) == index._fingerprint():
+                index.centroids = saved["centroids"]
+                index.assignments = saved["assignments"]
+        return index
+
+    def save(self, path, model_name=None):
+        super().save(path, model_name)
+        if self.is_trained:
+            np.savez(
+                ivf_path(path),
+                centroids=self.centroids,
+                assignments=self.assignments,
+                fingerprint=self._fingerprint(),
+            )
@@ -0,0 +1,133 @@
+from rag.numpy_index import top_k
+import os
+import re
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# words and numbers, so doses like "0.25mg" and "0.25 mg" share the token "0.25"
+TOKEN_PATTERN = re.compile(r"[a-z]+|\d+(?:\.\d+)?")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def lexical_path(vectors_path):
+    """Sidecar path holding the BM25 inverted index for a vector file"""
+    root, _ = os.path.splitext(vectors_path)
+    return f"{root}.bm25.npz"
+
+
+def reciprocal_rank_fusion(rankings, weights, rrf_k=60):
+    """Fuse ranked ID lists into one, best first
+
+    Each list contributes weight / (rrf_k + rank) per ID, so agreement between
+    rankings matters more than any one list's raw scores.
+    """
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item_id in enumerate(ranking, 1):
+            scores[item_id] = scores.get(item_id, 0.0) + weight / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class BM25Index:
+    def __init__(self, ids, vocab, offsets, postings, term_freqs, doc_lengths):
+        """Okapi BM25 over an inverted index stored as flat CSR arrays"""
+        self.ids = list(ids)
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets  # postings for term t: offsets[t]:offsets[t + 1]
+        self.postings = postings  # document row per posting
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = 1.5
+        self.b = 0.75
+
+        n = len(self.ids)
+        doc_freqs = np.diff(offsets)
+        self.idf = np.log(1.0 + (n - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        avg_length = doc_lengths.mean() if n else 1.0
+        # per-document length normalisation, precomputed once
+        self.norms = self.k1 * (1 - self.b + self.b * doc_lengths / avg_length)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids, texts):
+        """Tokenise texts and lay their postings out term by term"""
+        term_rows = {}  # term -> {row: count}
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[row] = len(tokens)
+            for token in tokens:
+                counts = term_rows.setdefault(token, {})
+                counts[row] = counts.get(row, 0) + 1
+
+        vocab = sorted(term_rows)
+        lengths = [len(term_rows[term]) for term in vocab]
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        postings = np.empty(offsets[-1], dtype=np.int32)
+        term_freqs = np.empty(offsets[-1], dtype=np.float32)
+        for t, term in enumerate(vocab):
+            counts = term_rows[term]
+            postings[offsets[t] : offsets[t + 1]] = list(counts.keys())
+            term_freqs[offsets[t] : offsets[t + 1]] = list(counts.values())
+
+        return cls(ids, vocab, offsets, postings, term_freqs, doc_lengths)
+
+    def search(self, query, k=10, rows=None):
+        """Top-k (chunk id, BM25 score) pairs for a text query
+
+        rows, if given, restricts results to those rows (e.g. a filter's).
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            t = self.vocab.get(token)
+            if t is None:
+                continue
+            docs = self.postings[self.offsets[t] : self.offsets[t + 1]]
+            tf = self.term_freqs[self.offsets[t] : self.offsets[t + 1]]
+            # each document appears once per term, so fancy-index add is safe
+            scores[docs] += self.idf[t] * tf * (self.k1 + 1) / (tf + self.norms[docs])
+
+        if rows is not None:
+            allowed = np.zeros(len(self.ids), dtype=bool)
+            allowed[rows] = True
+            scores[~allowed] = 0.0
+
+        matched = np.count_nonzero(scores)
+        if matched == 0:
+            return []
+        best = top_k(scores[None, :], min(k, matched))[0]
+        return [(self.ids[row], float(scores[row])) for row in best]
+
+    def save(self, path):
+        """Write the flat arrays uncompressed, so loading is a straight read"""
+        np.savez(
+            path,
+            # tokens and chunk ids are ascii, so bytes take a quarter of unicode
+            ids=np.char.encode(np.array(self.ids, dtype=str)),
+            vocab=np.char.encode(np.array(list(self.vocab), dtype=str)),
+            offsets=self.offsets,
+            postings=self.postings,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+        )
+        logger.info(f"Saved BM25 index over {len(self.ids)} chunks to {path}")
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(
+            np.char.decode(data["ids"]).tolist(),
+            np.char.decode(data["vocab"]).tolist(),
+            data["offsets"],
+            data["postings"],
+            data["term_freqs"],
+            data["doc_lengths"],
+        )
@@ -1,8 +1,24 @@
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 from rag.retriever import Retriever
-from rag.prompts import SYSTEM_PROMPT, HUMAN_PROMPT, format_context
+from rag.answer_cache import SemanticAnswerCache, answer_cache_key
+from rag.reranker import CrossEncoderReranker
+from rag.constants import (
+    ANSWER_CACHE_ENABLED,
+    BATCH_CONCURRENCY,
+    RERANK_ENABLED,
+    EMBEDDING_MODEL,
+    ANN_LISTS,
+    ANN_PROBES,
+    HYBRID_CANDIDATES,
+    RRF_K,
+)
+from rag.embedding_client import normalise_query
+from rag.prompts import SYSTEM_PROMPT, HUMAN_PROMPT, PROMPT_VERSION, format_context
 from dotenv import load_dotenv
+import json
+import time
+import asyncio
 import logging
 
 load_dotenv()
@@ -11,30 +27,364 @@ logger = logging.getLogger(__name__)
 
 
 class RAG:
-    def __init__(self, model_name="gpt-4o", temperature=0):
+    def __init__(
+        self,
+        model_name="gpt-4o",
+        temperature=0,
+        llm=None,
+        retriever=None,
+        answer_cache=None,
+        reranker=None,
+    ):
         """Orchestrate LLM and retriever for RAG"""
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature)
-        self.retriever = Retriever()
+        self.model_name = model_name
+        if llm is None:
+            llm = ChatOpenAI(model_name=model_name, temperature=temperature)
+        self.llm = llm
+        self.retriever = retriever if retriever is not None else Retriever()
+
+        # near-duplicate questions reuse a previous answer instead of calling the LLM
+        if answer_cache is None and ANSWER_CACHE_ENABLED:
+            answer_cache = SemanticAnswerCache()
+        self.answer_cache = answer_cache
+
+        # rescore over-fetched candidates so only the best k reach the prompt
+        if reranker is None and RERANK_ENABLED:
+            reranker = CrossEncoderReranker()
+        self.reranker = reranker
+        self.batch_stats = {}  # throughput of the last answer_batch call
 
     def _format_context(self, context_docs):
         """Format retrieved docs for prompt"""
         return format_context(context_docs)
 
-    def answer_question(self, query, k=3):
-        """Answer query with RAG"""
-
-        # get relevant docs
-        results = self.retriever.retrieve(query, k=k)
-        context_docs = self.retriever.format_retrieved_documents(results)
-
-        # create prompt
-        context_str = self._format_context(context_docs)
+    def _build_messages(self, query, context_docs, context_str=None):
+        if context_str is None:
+            context_str = self._format_context(context_docs)
         system_message = SystemMessage(content=SYSTEM_PROMPT)
         human_message = HumanMessage(
             content=HUMAN_PROMPT.format(query=query, context_str=context_str)
         )
+        return [system_message, human_message]
+
+    def _n_candidates(self, k):
+        return max(k, self.reranker.candidates) if self.reranker else k
+
+    def _format_results(self, query, results, k):
+        """Rerank candidates down to k, if enabled, and format them"""
+        if self.reranker is None:
+            return self.retriever.format_retrieved_documents(results)
+        results, rerank_scores = self.reranker.rerank(query, results, k)
+        context_docs = self.retriever.format_retrieved_documents(results)
+        for doc, score in zip(context_docs, rerank_scores):
+            doc["rerank_score"] = score
+        return context_docs
+
+    def retrieval_config(self):
+        """Everything besides the query that decides which chunks are retrieved"""
+        store = self.retriever.vector_store
+        return {
+            "backend": store.backend,
+            "ann": [ANN_LISTS, ANN_PROBES] if store.backend == "ivf" else None,
+            "embedding_model": EMBEDDING_MODEL,
+            "lexical_weight": self.retriever.lexical_weight,
+            "hybrid": [HYBRID_CANDIDATES, RRF_K],
+            "reranker": (
+                [self.reranker.name, self.reranker.candidates]
+                if self.reranker
+                else None
+            ),
+            # covers the chunker and its settings too, through the chunk IDs
+            "index": store.content_hash(),
+        }
+
+    def retrieve_context(self, query, k=3, filter=None):
+        """Retrieval only: formatted context docs, no LLM call"""
+        results = self.retriever.retrieve(query, k=self._n_candidates(k), filter=filter)
+        return self._format_results(query, results, k)
+
+    def generate_answer(self, query, context_docs):
+        """Generation only: answer query from already retrieved context"""
+        response = self.llm.invoke(self._build_messages(query, context_docs))
+        return response.content
+
+    def _cache_lookup(
+        self, query, context_docs, k, use_cache, filter=None, query_embedding=None
+    ):
+        """Answer cached for a near-duplicate query with the same context
+
+        Lookups run after retrieval: only an answer generated from exactly
+        context_docs can be reused, so a hit never shows another question's
+        sources. Returns the cached result (or None) plus the state needed
+        to store a new answer.
+        """
+        if not use_cache or self.answer_cache is None:
+            return None, None
+        context_ids = [doc["metadata"].get("chunk_id") for doc in context_docs]
+        if None in context_ids:
+            # chunks without stable ids can't be matched against a cached answer
+            return None, None
+
+        # retrieval embedded this query through the shared client, so it's cached
+        if query_embedding is None:
+            query_embedding = self.retriever.embedding_function.embed_query(query)
+        index_version = self.retriever.vector_store.index_version()
+        reranker = self.reranker.name if self.reranker else None
+        # a filtered question can only reuse answers built under the same filter
+        filter_key = json.dumps(filter, sort_keys=True) if filter else None
+        scope = (self.model_name, PROMPT_VERSION, k, reranker, filter_key)
+        key = answer_cache_key(scope, context_ids)
+        cached = self.answer_cache.lookup(query_embedding, key, index_version)
+        if cached is not None:
+            logger.info(f"Answer cache hit for query: {query}")
+            cached = {**cached, "question": query, "context": context_docs}
+        return cached, (query_embedding, key, index_version)
+
+    async def _acache_lookup(self, query, context_docs, k, use_cache, filter=None):
+        if not use_cache or self.answer_cache is None:
+            return None, None
+        query_embedding = await self.retriever.embedding_function.aembed_query(query)
+        return self._cache_lookup(
+            query, context_docs, k, use_cache, filter, query_embedding
+        )
+
+    def _cache_store(self, cache_state, result):
+        if cache_state is None:
+            return
+        query_embedding, key, index_version = cache_state
+        self.answer_cache.store(query_embedding, key, result, index_version)
+
+    def answer_question(
+        self, query, k=3, use_cache=True, context_docs=None, filter=None
+    ):
+        """Answer query with RAG, reusing context_docs if already retrieved
+
+        filter restricts retrieval by article metadata, e.g.
+        {"category": "Orders & Delivery", "tags": ["cancel"]}.
+        """
+        # get relevant docs
+        if context_docs is None:
+            context_docs = self.retrieve_context(query, k=k, filter=filter)
+
+        cached, cache_state = self._cache_lookup(
+            query, context_docs, k, use_cache, filter
+        )
+        if cached is not None:
+            return cached
 
         # query LLM
-        response = self.llm.invoke([system_message, human_message])
+        answer = self.generate_answer(query, context_docs)
+
+        result = {"question": query, "answer": answer, "context": context_docs}
+        self._cache_store(cache_state, result)
+        return result
+
+    def answer_batch(
+        self,
+        queries,
+        k=3,
+        use_cache=True,
+        filter=None,
+        max_concurrency=BATCH_CONCURRENCY,
+        return_exceptions=False,
+        on_result=None,
+    ):
+        """Answer many queries at once, returning results in the same order
+
+        Queries are embedded in one request and searched as one matrix
+        product. Repeated questions are answered once, prompts with the same
+        retrieved chunks share one formatted context, and at most
+        max_concurrency LLM calls run at a time. With return_exceptions, a
+        failed question's slot holds its exception instead of raising.
+        on_result(position, result) is called for each query as soon as its
+        answer is ready, e.g. to checkpoint it before the batch finishes.
+        """
+        start = time.perf_counter()
+        queries = list(queries)
+        # questions differing only in case or spacing share one answer
+        unique, positions = {}, {}
+        for position, query in enumerate(queries):
+            unique.setdefault(normalise_query(query), query)
+            positions.setdefault(normalise_query(query), []).append(position)
+        keys, texts = list(unique), list(unique.values())
+        answers = [None] * len(queries)
+
+        def finish(i, result):
+            for position in positions[keys[i]]:
+                if isinstance(result, dict):
+                    answers[position] = {**result, "question": queries[position]}
+                else:
+                    answers[position] = result
+                if on_result is not None:
+                    on_result(position, answers[position])
+
+        retrieved = []
+        if texts:
+            embeddings = self.retriever.embed_queries(texts)
+            retrieved = self.retriever.search_many(
+                texts, embeddings, k=self._n_candidates(k), filter=filter
+            )
+        contexts, cache_states, todo = {}, {}, []
+        for i, candidates in enumerate(retrieved):
+            contexts[i] = self._format_results(texts[i], candidates, k)
+            cached, cache_states[i] = self._cache_lookup(
+                texts[i], contexts[i], k, use_cache, filter, embeddings[i]
+            )
+            if cached is not None:
+                finish(i, cached)
+            else:
+                todo.append(i)
+
+        rendered, messages = {}, []
+        for i in todo:
+            chunk_ids = tuple(doc["metadata"].get("chunk_id") for doc in contexts[i])
+            if chunk_ids not in rendered:
+                rendered[chunk_ids] = self._format_context(contexts[i])
+            messages.append(
+                self._build_messages(texts[i], contexts[i], rendered[chunk_ids])
+            )
+
+        responses = []
+        if messages:
+            # answers arrive in completion order; finish() puts them in place
+            responses = self.llm.batch_as_completed(
+                messages,
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=return_exceptions,
+            )
+        failed = 0
+        for j, response in responses:
+            i = todo[j]
+            if isinstance(response, Exception):
+                failed += 1
+                finish(i, response)
+                continue
+            result = {
+                "question": texts[i],
+                "answer": response.content,
+                "context": contexts[i],
+            }
+            self._cache_store(cache_states[i], result)
+            finish(i, result)
+
+        elapsed = time.perf_counter() - start
+        self.batch_stats = {
+            "queries": len(queries),
+            "unique_queries": len(texts),
+            "cache_hits": len(texts) - len(todo),
+            "llm_calls": len(todo),
+            "distinct_contexts": len(rendered),
+            "failed": failed,
+            "seconds": elapsed,
+            "queries_per_second": len(queries) / elapsed if elapsed else 0.0,
+        }
+        logger.info(
+            f"Answered {len(queries)} queries in {elapsed:.2f}s "
+            f"({self.batch_stats['queries_per_second']:.1f}/s): "
+            f"{len(texts)} unique, {len(texts) - len(todo)} from the answer cache, "
+            f"{len(todo)} LLM calls, {failed} failed"
+        )
+        return answers
+
+    def stream_answer(self, query, k=3, use_cache=True, context_docs=None, filter=None):
+        """Yield a sources event, then answer tokens as the LLM produces them"""
+        start = time.perf_counter()
+        if context_docs is None:
+            context_docs = self.retrieve_context(query, k=k, filter=filter)
+        yield {"type": "sources", "sources": context_docs}
+
+        cached, cache_state = self._cache_lookup(
+            query, context_docs, k, use_cache, filter
+        )
+        if cached is not None:
+            yield {"type": "token", "content": cached["answer"]}
+            ttft = time.perf_counter() - start
+            yield {"type": "done", "ttft_seconds": ttft, "total_seconds": ttft}
+            return
+
+        # pass tokens straight through instead of waiting for the full answer
+        ttft = None
+        tokens = []
+        for chunk in self.llm.stream(self._build_messages(query, context_docs)):
+            if not chunk.content:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            tokens.append(chunk.content)
+            yield {"type": "token", "content": chunk.content}
+
+        total = time.perf_counter() - start
+        logger.info(
+            f"Streamed answer: first token after {(ttft or total) * 1000:.0f}ms, "
+            f"complete after {total * 1000:.0f}ms"
+        )
+        result = {"question": query, "answer": "".join(tokens), "context": context_docs}
+        self._cache_store(cache_state, result)
+        yield {"type": "done", "ttft_seconds": ttft, "total_seconds": total}
+
+    async def aretrieve_context(self, query, k=3, filter=None):
+        """Async retrieve_context"""
+        results = await self.retriever.aretrieve(
+            query, k=self._n_candidates(k), filter=filter
+        )
+        if self.reranker is None:
+            return self.retriever.format_retrieved_documents(results)
+        # scoring is CPU-bound model inference, so keep it off the event loop
+        return await asyncio.to_thread(self._format_results, query, results, k)
+
+    async def agenerate_answer(self, query, context_docs):
+        """Async generate_answer: awaits the LLM without holding a thread"""
+        response = await self.llm.ainvoke(self._build_messages(query, context_docs))
+        return response.content
+
+    async def aanswer_question(
+        self, query, k=3, use_cache=True, context_docs=None, filter=None
+    ):
+        """Async answer_question"""
+        if context_docs is None:
+            context_docs = await self.aretrieve_context(query, k=k, filter=filter)
+        cached, cache_state = await self._acache_lookup(
+            query, context_docs, k, use_cache, filter
+        )
+        if cached is not None:
+            return cached
+
+        answer = await self.agenerate_answer(query, context_docs)
+
+        result = {"question": query, "answer": answer, "context": context_docs}
+        self._cache_store(cache_state, result)
+        return result
+
+    async def astream_answer(
+        self, query, k=3, use_cache=True, context_docs=None, filter=None
+    ):
+        """Async stream_answer, yielding the same events"""
+        start = time.perf_counter()
+        if context_docs is None:
+            context_docs = await self.aretrieve_context(query, k=k, filter=filter)
+        yield {"type": "sources", "sources": context_docs}
+
+        cached, cache_state = await self._acache_lookup(
+            query, context_docs, k, use_cache, filter
+        )
+        if cached is not None:
+            yield {"type": "token", "content": cached["answer"]}
+            ttft = time.perf_counter() - start
+            yield {"type": "done", "ttft_seconds": ttft, "total_seconds": ttft}
+            return
+
+        ttft = None
+        tokens = []
+        messages = self._build_messages(query, context_docs)
+        async for chunk in self.llm.astream(messages):
+            if not chunk.content:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            tokens.append(chunk.content)
+            yield {"type": "token", "content": chunk.content}
 
-        return {"question": query, "answer": response.content, "context": context_docs}
+        total = time.perf_counter() - start
+        result = {"question": query, "answer": "".join(tokens), "context": context_docs}
+        self._cache_store(cache_state, result)
+        yield {"type": "done", "ttft_seconds": ttft, "total_seconds": total}
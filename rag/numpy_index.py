@@ -0,0 +1,198 @@
+from langchain.schema import Document
+from database.embedding_store import EmbeddingStore
+from database.chunking import make_chunk_id
+import math
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# filters matching more than 1 / FILTER_GATHER_RATIO of the rows mask a full
+# scan instead of copying their rows out
+FILTER_GATHER_RATIO = 5
+
+
+def normalise_rows(matrix):
+    """Scale each row to unit length so dot products are cosine similarities"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def cosine_to_relevance(similarities):
+    """Map cosine similarity onto the score scale Chroma reports
+
+    Chroma's default squared-L2 distance between unit vectors is 2 - 2cos, and
+    LangChain turns that into a relevance score of 1 - distance / sqrt(2).
+    """
+    return 1.0 - (2.0 - 2.0 * similarities) / math.sqrt(2)
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores per row, best first"""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    # argpartition is O(n) per row; only the k winners get sorted
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+class NumpyIndex:
+    def __init__(self, embedding_function=None, dim=None):
+        """Exact in-memory vector index over a contiguous float32 matrix"""
+        self.embedding_function = embedding_function
+        # rows live at the front of a larger buffer, grown geometrically, so
+        # appending a batch doesn't copy the whole matrix every time
+        self._buffer = np.empty((0, dim or 0), dtype=np.float32)
+        self.vectors = self._buffer
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self._positions = {}  # chunk id -> row
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_store(cls, store, embedding_function=None):
+        """Build an index from an EmbeddingStore"""
+        index = cls(embedding_function, dim=store.dim)
+        ids = []
+        for record in store.records:
+            metadata = record["metadata"]
+            # results carry their ID so they can be matched with keyword hits
+            metadata.setdefault(
+                "chunk_id",
+                make_chunk_id(
+                    metadata.get("doc_id"), metadata.get("chunk_index"), record["text"]
+                ),
+            )
+            ids.append(metadata["chunk_id"])
+        index.upsert(
+            ids=ids,
+            embeddings=store.vectors,
+            documents=[record["text"] for record in store.records],
+            metadatas=[record["metadata"] for record in store.records],
+        )
+        return index
+
+    @classmethod
+    def load(cls, path, embedding_function=None):
+        """Load an index saved in the binary embedding store format"""
+        return cls.from_store(EmbeddingStore.load(path), embedding_function)
+
+    def save(self, path, model_name=None):
+        """Persist in the binary embedding store format"""
+        records = [
+            {"text": text, "metadata": metadata}
+            for text, metadata in zip(self.texts, self.metadatas)
+        ]
+        EmbeddingStore(self.vectors, records, model_name).save(path)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        """Insert rows, replacing any with the same ID"""
+        vectors = normalise_rows(embeddings)
+        if self.vectors.shape[1] == 0:
+            self._buffer = np.empty((0, vectors.shape[1]), dtype=np.float32)
+            self.vectors = self._buffer
+
+        new_rows = []
+        for i, chunk_id in enumerate(ids):
+            row = self._positions.get(chunk_id)
+            if row is None:
+                new_rows.append(i)
+            else:
+                self.vectors[row] = vectors[i]
+                self.texts[row] = documents[i]
+                self.metadatas[row] = metadatas[i]
+
+        if new_rows:
+            start = len(self.ids)
+            end = start + len(new_rows)
+            if end > len(self._buffer):
+                buffer = np.empty(
+                    (max(end, 2 * len(self._buffer)), vectors.shape[1]),
+                    dtype=np.float32,
+                )
+                buffer[:start] = self.vectors
+                self._buffer = buffer
+            self._buffer[start:end] = vectors[new_rows]
+            self.vectors = self._buffer[:end]
+            for offset, i in enumerate(new_rows):
+                self._positions[ids[i]] = start + offset
+                self.ids.append(ids[i])
+                self.texts.append(documents[i])
+                self.metadatas.append(metadatas[i])
+
+    def delete(self, ids):
+        """Remove rows by ID"""
+        drop = {self._positions[i] for i in ids if i in self._positions}
+        if not drop:
+            return
+        keep = [row for row in range(len(self.ids)) if row not in drop]
+        self._buffer = np.ascontiguousarray(self.vectors[keep])
+        self.vectors = self._buffer
+        self.ids = [self.ids[row] for row in keep]
+        self.texts = [self.texts[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self._positions = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+
+    def search_by_vectors(self, query_vectors, k=3, rows=None):
+        """Top-k (rows, cosine similarities) for a batch of query vectors
+
+        rows, if given, restricts the search to those rows (e.g. a filter's).
+        """
+        queries = normalise_rows(query_vectors)
+        if rows is not None and len(rows) * FILTER_GATHER_RATIO > len(self.ids):
+            # copying out a large subset costs more than scoring everything,
+            # so score the whole matrix and mask out the other rows instead
+            scores = queries @ self.vectors.T
+            masked = np.full_like(scores, -np.inf)
+            masked[:, rows] = scores[:, rows]
+            best = top_k(masked, min(k, len(rows)))
+            return best, np.take_along_axis(masked, best, axis=1)
+
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if len(vectors) == 0:
+            empty = np.empty((queries.shape[0], 0))
+            return empty.astype(np.int64), empty
+
+        # one matrix-matrix product scores every query against every chunk
+        scores = queries @ vectors.T
+        best = top_k(scores, k)
+        similarities = np.take_along_axis(scores, best, axis=1)
+        return (best if rows is None else rows[best]), similarities
+
+    def _to_results(self, rows, similarities):
+        relevance = cosine_to_relevance(similarities)
+        return [
+            (
+                Document(page_content=self.texts[row], metadata=self.metadatas[row]),
+                float(score),
+            )
+            for row, score in zip(rows, relevance)
+        ]
+
+    def similarity_search_by_vectors_with_relevance_scores(
+        self, query_vectors, k=3, rows=None
+    ):
+        """Batched search, one result list per query"""
+        rows, similarities = self.search_by_vectors(query_vectors, k, rows=rows)
+        return [self._to_results(r, s) for r, s in zip(rows, similarities)]
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding, k=3, rows=None
+    ):
+        return self.similarity_search_by_vectors_with_relevance_scores(
+            [embedding], k, rows=rows
+        )[0]
+
+    def similarity_search_with_relevance_scores(self, query, k=3):
+        """Same (Document, score) output as the LangChain Chroma method"""
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(embedding, k)
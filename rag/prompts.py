@@ -1,3 +1,10 @@
+from rag.constants import CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET
+from rag.tokens import count_tokens
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
 SYSTEM_PROMPT = """
 You are a helpful rag-based assistant that answers questions based on the provided context.
 Follow these guidelines precisely:
@@ -26,13 +33,74 @@ context:
 If the context doesn't contain the information needed, acknowledge this clearly.
 """
 
+# changes whenever the prompt text (or how context is packed into it) does,
+# so cached answers from old prompts are ignored
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + HUMAN_PROMPT + str(CONTEXT_TOKEN_BUDGET)).encode("utf-8")
+).hexdigest()[:12]
 
-def format_context(context_docs):
-    """Organise retrieved docs for prompt"""
-    context_parts = []
+
+def strip_overlap(previous, text, max_overlap=CHUNK_OVERLAP, min_overlap=16):
+    """text without the prefix it shares with the end of previous, or None"""
+    # short matches are likely coincidence rather than splitter overlap
+    for n in range(min(len(previous), len(text), max_overlap), min_overlap - 1, -1):
+        if previous.endswith(text[:n]):
+            return text[n:]
+    return None
+
+
+def merge_chunks(docs):
+    """One article's chunks in order, with overlapping text kept only once"""
+    docs = sorted(docs, key=lambda doc: doc["metadata"].get("chunk_index", 0))
+    parts = [docs[0]["content"]]
+    for previous, doc in zip(docs, docs[1:]):
+        index = doc["metadata"].get("chunk_index")
+        adjacent = index is not None and index - 1 == previous["metadata"].get(
+            "chunk_index"
+        )
+        rest = strip_overlap(previous["content"], doc["content"]) if adjacent else None
+        if rest is None:
+            # gaps between non-adjacent chunks are marked so they aren't read as one
+            parts.append("\n" if adjacent else "\n...\n")
+            rest = doc["content"]
+        parts.append(rest)
+    return "".join(parts)
+
+
+def render_context(context_docs):
+    """One source per article, ordered by its best-ranked chunk"""
+    articles = {}
     for i, doc in enumerate(context_docs):
-        title = doc["metadata"].get("title", "untitled")
-        content = doc["content"]
-        context_parts.append(f"source {i+1}: {title}\n{content}\n")
+        doc_id = doc["metadata"].get("doc_id") or f"unknown-{i}"
+        articles.setdefault(doc_id, []).append(doc)
+
+    context_parts = []
+    for i, docs in enumerate(articles.values()):
+        title = docs[0]["metadata"].get("title", "untitled")
+        context_parts.append(f"source {i+1}: {title}\n{merge_chunks(docs)}\n")
 
     return "\n".join(context_parts)
+
+
+def format_context(context_docs, token_budget=CONTEXT_TOKEN_BUDGET):
+    """Organise retrieved docs for prompt, within token_budget
+
+    Docs are taken in rank order; any that would push the context over budget
+    are dropped, though the best-ranked doc is always kept.
+    """
+    if token_budget is None or not context_docs:
+        return render_context(context_docs)
+
+    selected = []
+    for doc in context_docs:
+        candidate = selected + [doc]
+        if selected and count_tokens(render_context(candidate)) > token_budget:
+            continue
+        selected = candidate
+
+    if len(selected) < len(context_docs):
+        logger.info(
+            f"Context over {token_budget} tokens, "
+            f"kept {len(selected)} of {len(context_docs)} chunks"
+        )
+    return render_context(selected)
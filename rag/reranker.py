@@ -0,0 +1,90 @@
+from rag.constants import RERANK_MODEL, RERANK_CANDIDATES, RERANK_BATCH_SIZE
+from abc import ABC, abstractmethod
+from collections import deque
+import time
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker(ABC):
+    def __init__(self, candidates=RERANK_CANDIDATES, batch_size=RERANK_BATCH_SIZE):
+        """Rescore over-fetched retrieval candidates and keep the best k"""
+        self.name = type(self).__name__
+        self.candidates = candidates  # chunks fetched from the retriever per query
+        self.batch_size = batch_size  # (query, chunk) pairs scored per model call
+        self.calls = 0
+        self.pairs = 0
+        self._latencies = deque(maxlen=1000)  # seconds, most recent calls
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def score(self, query, texts):
+        """Relevance of each text to the query, higher is better"""
+
+    def rerank(self, query, results, k=3):
+        """Best k (Document, relevance) pairs by reranker score, plus the scores"""
+        if not results:
+            return [], []
+
+        start = time.perf_counter()
+        scores = np.asarray(
+            self.score(query, [doc.page_content for doc, _ in results]),
+            dtype=np.float32,
+        )
+        # stable, so ties keep the retriever's order
+        order = np.argsort(-scores, kind="stable")[:k]
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.calls += 1
+            self.pairs += len(results)
+            self._latencies.append(elapsed)
+        logger.info(
+            f"Reranked {len(results)} candidates to {len(order)} "
+            f"in {elapsed * 1000:.1f}ms"
+        )
+        return [results[i] for i in order], [float(scores[i]) for i in order]
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            return {
+                "model": self.name,
+                "calls": self.calls,
+                "pairs": self.pairs,
+                "p50_ms": float(np.percentile(latencies, 50)) if self.calls else 0.0,
+                "p99_ms": float(np.percentile(latencies, 99)) if self.calls else 0.0,
+            }
+
+
+class CrossEncoderReranker(Reranker):
+    def __init__(
+        self,
+        model_name=RERANK_MODEL,
+        candidates=RERANK_CANDIDATES,
+        batch_size=RERANK_BATCH_SIZE,
+        max_length=512,
+    ):
+        """Local cross-encoder that reads the query and chunk together, on CPU"""
+        # optional dependency: it pulls in torch, so only import it when enabled
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "reranking needs sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        super().__init__(candidates, batch_size)
+        self.name = model_name
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        logger.info(f"Loaded reranker {model_name}")
+
+    def score(self, query, texts):
+        pairs = [(query, text) for text in texts]
+        return self.model.predict(
+            pairs, batch_size=self.batch_size, show_progress_bar=False
+        )
@@ -1,12 +1,16 @@
-from langchain_openai import OpenAIEmbeddings
 from rag.vectorstore import VectorStore
+from rag.lexical import reciprocal_rank_fusion
+from rag.constants import LEXICAL_WEIGHT, HYBRID_CANDIDATES, RRF_K
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class Retriever:
-    def __init__(self, vector_store=None, persist_directory=None):
+    def __init__(
+        self, vector_store=None, persist_directory=None, lexical_weight=LEXICAL_WEIGHT
+    ):
         """Initialise the retriever with a vector store"""
         if vector_store is None:
             self.vector_store = VectorStore(persist_directory)
@@ -14,12 +18,81 @@ class Retriever:
             self.vector_store = vector_store
 
         self.db = self.vector_store.get_db()
-        self.embedding_function = OpenAIEmbeddings()
+        # queries are embedded by the store's (shared, cached) client
+        self.embedding_function = self.vector_store.embedding_function
+        self.lexical_weight = lexical_weight
 
-    def retrieve(self, query, k=3):
-        """Get similar documents using LangChain's retriever"""
-        results = self.db.similarity_search_with_relevance_scores(query, k=k)
-        return results
+    def retrieve(self, query, k=3, filter=None):
+        """Get similar documents, fusing keyword matches in when enabled"""
+        embedding = self.embedding_function.embed_query(query)
+        return self.search(query, embedding, k, filter)
+
+    async def aretrieve(self, query, k=3, filter=None):
+        """Async retrieve: awaits the embedding call instead of blocking on it"""
+        embedding = await self.embedding_function.aembed_query(query)
+        if self.vector_store.backend in ("numpy", "ivf"):
+            # in-process search is a matmul plus a few postings lists,
+            # cheap enough for the event loop
+            return self.search(query, embedding, k, filter)
+        # chroma's client is synchronous, so keep it off the event loop
+        return await asyncio.to_thread(self.search, query, embedding, k, filter)
+
+    def embed_queries(self, queries):
+        """Embed many queries in one request, through the query cache if there is one"""
+        embed_queries = getattr(self.embedding_function, "embed_queries", None)
+        if embed_queries is not None:
+            return embed_queries(queries)
+        return self.embedding_function.embed_documents(queries)
+
+    def search(self, query, embedding, k=3, filter=None):
+        """Dense search, reranked with BM25 by reciprocal rank fusion
+
+        Exact terms like drug names and doses can rank poorly on embeddings
+        alone; chunks found only by keyword are scored against the query
+        vector so every result keeps a comparable relevance score. filter
+        (e.g. {"category": "Orders & Delivery"}) limits both searches to
+        matching chunks.
+        """
+        return self.search_many([query], [embedding], k, filter)[0]
+
+    def search_many(self, queries, embeddings, k=3, filter=None):
+        """search for many queries, with the dense search done as one batch"""
+        rows = self.vector_store.filter_rows(filter)
+        lexical = self.vector_store.lexical
+        if not self.lexical_weight or lexical is None:
+            return self.vector_store.search_by_vectors(embeddings, k=k, rows=rows)
+
+        n_candidates = max(k, HYBRID_CANDIDATES)
+        dense = self.vector_store.search_by_vectors(
+            embeddings, k=n_candidates, rows=rows
+        )
+        return [
+            self._fuse(query, embedding, results, k, n_candidates, rows)
+            for query, embedding, results in zip(queries, embeddings, dense)
+        ]
+
+    def _fuse(self, query, embedding, dense, k, n_candidates, rows):
+        """Merge one query's dense results with its BM25 results"""
+        lexical = self.vector_store.lexical
+        by_id = {doc.metadata.get("chunk_id"): (doc, score) for doc, score in dense}
+        keyword_ids = [
+            chunk_id for chunk_id, _ in lexical.search(query, n_candidates, rows=rows)
+        ]
+
+        fused = reciprocal_rank_fusion(
+            [list(by_id), keyword_ids], [1.0, self.lexical_weight], RRF_K
+        )[:k]
+        missing = [chunk_id for chunk_id in fused if chunk_id not in by_id]
+        if missing:
+            by_id.update(
+                zip(missing, self.vector_store.documents_by_id(missing, embedding))
+            )
+        return [by_id[chunk_id] for chunk_id in fused]
+
+    def cache_stats(self):
+        """Query embedding cache hits/misses, if the client keeps them"""
+        stats = getattr(self.embedding_function, "stats", None)
+        return stats() if stats else {}
 
     def format_retrieved_documents(self, results):
         """Format retrieved documents into a more readable structure"""
@@ -0,0 +1,30 @@
+from rag.constants import MODEL_NAME
+from functools import lru_cache
+import logging
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # rough average for english text with OpenAI tokenizers
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name=MODEL_NAME):
+    """tiktoken encoding for a model, or None if it can't be loaded"""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except Exception as e:
+        # the encoding file is downloaded on first use, so this fails offline
+        logger.warning(
+            f"No tokenizer for {model_name} ({type(e).__name__}), "
+            f"estimating {CHARS_PER_TOKEN} characters per token"
+        )
+        return None
+
+
+def count_tokens(text, model_name=MODEL_NAME):
+    """Number of tokens text costs in a prompt for model_name"""
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,65 @@
+from rag.constants import TURN_CACHE_TTL
+from collections import OrderedDict
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TurnCache:
+    def __init__(self, ttl_seconds=TURN_CACHE_TTL, max_entries=1024):
+        """Short-lived results shared by the requests that make up one chat turn"""
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.computed = 0
+        self.shared = 0
+        self._entries = OrderedDict()  # key -> [lock, value, created_at]
+        self._lock = threading.Lock()
+
+    def _entry(self, key, make_lock=threading.Lock):
+        now = time.monotonic()
+        with self._lock:
+            # expire from the oldest end; entries are kept in creation order
+            while self._entries:
+                oldest = next(iter(self._entries.values()))
+                if now - oldest[2] < self.ttl_seconds and (
+                    len(self._entries) < self.max_entries
+                ):
+                    break
+                self._entries.popitem(last=False)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = [make_lock(), None, now]
+                self._entries[key] = entry
+            return entry
+
+    def get_or_compute(self, key, compute):
+        """Return the value for key, computing it once even under concurrent calls"""
+        entry = self._entry(key)
+        # the per-turn lock makes a second request wait for the first one's result
+        with entry[0]:
+            if entry[1] is None:
+                entry[1] = compute()
+                self.computed += 1
+            else:
+                self.shared += 1
+            return entry[1]
+
+    async def aget_or_compute(self, key, compute):
+        """Async get_or_compute; compute is a coroutine function"""
+        entry = self._entry(key, make_lock=asyncio.Lock)
+        async with entry[0]:
+            if entry[1] is None:
+                entry[1] = await compute()
+                self.computed += 1
+            else:
+                self.shared += 1
+            return entry[1]
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"computed": self.computed, "shared": self.shared, "size": size}
@@ -1,49 +1,480 @@
 from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
+from langchain.schema import Document
+from rag.constants import (
+    EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS,
+    VECTOR_BACKEND,
+    ANN_LISTS,
+    ANN_PROBES,
+)
+from rag.embedding_client import get_embedding_client
+from rag.numpy_index import NumpyIndex, normalise_rows, cosine_to_relevance
+from rag.lexical import BM25Index, lexical_path
+from rag.facets import FacetIndex
+from rag.ivf_index import IVFIndex
+from database.chunking import make_chunk_id
+from database.embedding_store import EmbeddingStore
 import os
 import json
+import hashlib
 import logging
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 
+def with_chunk_id(metadata, stored_id):
+    """Metadata with a chunk_id, falling back to the stored ID
+
+    Chroma stores built by the old add_texts path have UUID IDs and no
+    chunk_id; without the fallback their results couldn't be told apart.
+    """
+    return {"chunk_id": stored_id, **(metadata or {})}
+
+
 class VectorStore:
-    def __init__(self, persist_directory=None):
-        """Initialise Chroma vector store for RAG"""
+    def __init__(
+        self,
+        persist_directory=None,
+        backend=VECTOR_BACKEND,
+        embedding_function=None,
+        index_path=None,
+    ):
+        """Initialise the vector store for RAG (Chroma, NumPy or IVF backend)"""
+        root = Path(__file__).resolve().parent.parent
         # fix path handling to be relative to the project root
         if persist_directory is None:
             # use absolute path based on this file's location
-            persist_directory = os.path.join(
-                Path(__file__).resolve().parent.parent, "data/embeddings/chroma_db"
-            )
+            persist_directory = os.path.join(root, "data/embeddings/chroma_db")
+        source_path = None
+        if index_path is None:
+            # the index keeps its own file, so writes never touch the
+            # embeddings.npy artifact that create_embeddings.py produces
+            index_path = os.path.join(root, "data/embeddings/embeddings.index.npy")
+            source_path = os.path.join(root, "data/embeddings/embeddings.npy")
+        if not os.path.exists(index_path) and source_path is not None:
+            # first run: start from the embeddings file, saved as the index on flush
+            load_path = source_path if os.path.exists(source_path) else None
+        else:
+            load_path = index_path if os.path.exists(index_path) else None
 
-        self.embedding_function = OpenAIEmbeddings()
+        # queries must be embedded with the same model as the stored vectors;
+        # the shared client caches repeat queries across every store instance
+        if embedding_function is None:
+            embedding_function = get_embedding_client(EMBEDDING_MODEL)
+        self.embedding_function = embedding_function
+        self.backend = backend
         self.persist_directory = persist_directory
-        os.makedirs(self.persist_directory, exist_ok=True)
+        self.index_path = index_path
+        self.version = 0  # bumped on every in-process write
+        self._unsaved = False  # writes not yet saved by flush
+
+        if backend == "numpy":
+            # keep every normalised vector in one matrix and search in-process
+            if load_path is not None:
+                self.db = NumpyIndex.load(load_path, self.embedding_function)
+            else:
+                self.db = NumpyIndex(self.embedding_function)
+            logger.info(f"Loaded NumPy index with {len(self.db)} vectors")
+        elif backend == "ivf":
+            # same storage as numpy, but only the closest clusters are scanned
+            if load_path is not None:
+                self.db = IVFIndex.load(
+                    load_path, self.embedding_function, ANN_LISTS, ANN_PROBES
+                )
+            else:
+                self.db = IVFIndex(
+                    self.embedding_function, n_lists=ANN_LISTS, n_probe=ANN_PROBES
+                )
+            logger.info(f"Loaded IVF index with {len(self.db)} vectors")
+        elif backend == "chroma":
+            os.makedirs(self.persist_directory, exist_ok=True)
+
+            if not os.path.exists(
+                os.path.join(self.persist_directory, "chroma.sqlite3")
+            ):
+                # create DB if it doesn't exist
+                self.db = Chroma(
+                    embedding_function=self.embedding_function,
+                    persist_directory=self.persist_directory,
+                )
+                self.db.persist()
+            else:
+                # load DB if it already exists
+                self.db = Chroma(
+                    embedding_function=self.embedding_function,
+                    persist_directory=self.persist_directory,
+                )
+        else:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+
+        # keyword and facet indexes over the same chunks, in the same row order,
+        # kept in step with every write
+        if backend == "chroma":
+            self.lexical_path = os.path.join(self.persist_directory, "bm25.npz")
+        else:
+            self.lexical_path = lexical_path(index_path)
+        self._load_indexes()
+
+    def _collection(self):
+        """Low-level upsert/delete target for the active backend"""
+        return self.db if self.backend in ("numpy", "ivf") else self.db._collection
+
+    def index_version(self):
+        """Changes whenever the index is written, here or by another process"""
+        if self.backend in ("numpy", "ivf"):
+            path = self.index_path
+        else:
+            path = os.path.join(self.persist_directory, "chroma.sqlite3")
+        mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        return (self.version, mtime)
+
+    def _written(self, flush):
+        """Record a write, saving it now or leaving it for a later flush"""
+        self.version += 1
+        self._unsaved = True
+        # the BM25 and facet indexes read every chunk, so rebuild them together
+        # once per burst of writes (on the next query or flush), not per batch
+        self._indexes_stale = True
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Save pending writes; batched writers call this once at the end"""
+        if self._unsaved:
+            if self.backend == "ivf" and not self.db.is_trained:
+                self.db.train()
+            if self.backend in ("numpy", "ivf"):
+                self.db.save(self.index_path, model_name=EMBEDDING_MODEL)
+            else:
+                self.db.persist()
+            self._unsaved = False
+        self._refresh_indexes()
+
+    def _all_chunks(self, include_texts=True):
+        """(ids, texts, metadatas) for every stored chunk, in row order"""
+        if self.backend in ("numpy", "ivf"):
+            return list(self.db.ids), list(self.db.texts), list(self.db.metadatas)
+        include = ["documents", "metadatas"] if include_texts else ["metadatas"]
+        stored = self.db._collection.get(include=include)
+        return stored["ids"], stored.get("documents"), stored["metadatas"]
 
-        if not os.path.exists(os.path.join(self.persist_directory, "chroma.sqlite3")):
-            # create DB if it doesn't exist
-            self.db = Chroma(
-                embedding_function=self.embedding_function,
-                persist_directory=self.persist_directory,
+    def _load_indexes(self):
+        """Load the saved BM25 index (rebuilding it if stale) and the facet sets"""
+        ids, _, metadatas = self._all_chunks(include_texts=False)
+        self._row_ids = ids
+        self._facets = FacetIndex(metadatas)
+
+        self._lexical = None
+        self._indexes_stale = False
+        if os.path.exists(self.lexical_path):
+            lexical = BM25Index.load(self.lexical_path)
+            # rows must line up with the store's for filters to apply to both
+            if lexical.ids == ids:
+                self._lexical = lexical
+                return
+        if ids:
+            logger.info("BM25 index missing or stale, rebuilding it")
+            self._build_indexes()
+
+    def _build_indexes(self):
+        """Rebuild the BM25 index and facet row sets from one read of the store"""
+        ids, texts, metadatas = self._all_chunks()
+        self._row_ids = ids
+        self._facets = FacetIndex(metadatas)
+        self._lexical = BM25Index.build(ids, texts) if ids else None
+        if self._lexical is not None:
+            self._lexical.save(self.lexical_path)
+        self._indexes_stale = False
+
+    def _refresh_indexes(self):
+        if self._indexes_stale:
+            self._build_indexes()
+
+    @property
+    def lexical(self):
+        """BM25 index over the stored chunks, rebuilt first if writes made it stale"""
+        self._refresh_indexes()
+        return self._lexical
+
+    @property
+    def facets(self):
+        """Facet row sets, in the same row order as lexical"""
+        self._refresh_indexes()
+        return self._facets
+
+    @property
+    def row_ids(self):
+        """Chunk ID of each row that lexical and facets refer to"""
+        self._refresh_indexes()
+        return self._row_ids
+
+    def content_hash(self):
+        """Fingerprint of the stored chunks that, unlike index_version, survives restarts
+
+        Chunk IDs hash their text, so this changes whenever any chunk is
+        added, removed or rewritten (e.g. by a different chunker).
+        """
+        ids = "\n".join(sorted(str(chunk_id) for chunk_id in self.row_ids))
+        return hashlib.sha256(ids.encode("utf-8")).hexdigest()[:16]
+
+    def filter_rows(self, filter):
+        """Rows matching a metadata filter, or None if there is no filter"""
+        return self.facets.select(filter)
+
+    def search_by_vector(self, embedding, k=3, rows=None):
+        """(Document, relevance score) pairs for a query vector, best first
+
+        rows (from filter_rows) restricts the search to matching chunks.
+        """
+        return self.search_by_vectors([embedding], k=k, rows=rows)[0]
+
+    def search_by_vectors(self, embeddings, k=3, rows=None):
+        """search_by_vector for many queries, one result list per query"""
+        if rows is not None and len(rows) == 0:
+            return [[] for _ in embeddings]
+        if self.backend in ("numpy", "ivf"):
+            # every query is scored in one matrix-matrix product
+            return self.db.similarity_search_by_vectors_with_relevance_scores(
+                embeddings, k=k, rows=rows
             )
-            self.db.persist()
+
+        where = None
+        if rows is not None:
+            where = {"chunk_id": {"$in": [self.row_ids[row] for row in rows]}}
+        # query the collection directly: unlike langchain's wrapper it returns
+        # the stored IDs, and takes every query in one call
+        found = self.db._collection.query(
+            query_embeddings=[list(embedding) for embedding in embeddings],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        relevance = self.db._select_relevance_score_fn()
+        return [
+            [
+                (
+                    Document(page_content=text, metadata=with_chunk_id(metadata, id)),
+                    relevance(distance),
+                )
+                for id, text, metadata, distance in zip(*result)
+            ]
+            for result in zip(
+                found["ids"],
+                found["documents"],
+                found["metadatas"],
+                found["distances"],
+            )
+        ]
+
+    def documents_by_id(self, ids, embedding):
+        """(Document, relevance to embedding) for chunks found by other means"""
+        query = normalise_rows(embedding)[0]
+        if self.backend in ("numpy", "ivf"):
+            rows = [self.db._positions[chunk_id] for chunk_id in ids]
+            vectors = self.db.vectors[rows]
+            texts = [self.db.texts[row] for row in rows]
+            metadatas = [self.db.metadatas[row] for row in rows]
         else:
-            # load DB if it already exists
-            self.db = Chroma(
-                embedding_function=self.embedding_function,
-                persist_directory=self.persist_directory,
+            stored = self.db._collection.get(
+                ids=list(ids), include=["documents", "metadatas", "embeddings"]
             )
+            order = [stored["ids"].index(chunk_id) for chunk_id in ids]
+            vectors = normalise_rows([stored["embeddings"][i] for i in order])
+            texts = [stored["documents"][i] for i in order]
+            metadatas = [stored["metadatas"][i] for i in order]
 
-    def add_documents(self, chunks):
+        relevance = cosine_to_relevance(vectors @ query)
+        return [
+            (
+                Document(page_content=text, metadata=with_chunk_id(metadata, id)),
+                float(score),
+            )
+            for id, text, metadata, score in zip(ids, texts, metadatas, relevance)
+        ]
+
+    def add_documents(self, chunks, flush=True):
         """Add document chunked embeedings to vector store"""
+        if self.backend in ("numpy", "ivf"):
+            # the in-process indexes have no embedding hook, so embed here
+            vectors = self.embedding_function.embed_documents(
+                [chunk["text"] for chunk in chunks]
+            )
+            for chunk, vector in zip(chunks, vectors):
+                chunk["embedding"] = vector
+            self.add_embeddings(chunks, flush=flush)
+            return
+
         texts = [chunk["text"] for chunk in chunks]
         metadatas = [chunk["metadata"] for chunk in chunks]
-        self.db.add_texts(texts=texts, metadatas=metadatas)
-        self.db.persist()
+        ids = [self.chunk_id(chunk) for chunk in chunks]
+        self.db.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+        self._written(flush)
         logger.info(f"Added {len(chunks)} docs to vector store")
 
+    def _validate_embeddings(self, chunks):
+        """Check precomputed vectors match the configured embedding model"""
+        expected_dim = EMBEDDING_DIMENSIONS.get(EMBEDDING_MODEL)
+
+        for chunk in chunks:
+            if "embedding" not in chunk:
+                raise ValueError(
+                    f"Chunk {chunk['metadata'].get('doc_id')} has no precomputed embedding"
+                )
+
+            # older embedding files don't record the model, so assume it matches
+            model_name = chunk.get("embedding_model", EMBEDDING_MODEL)
+            if model_name != EMBEDDING_MODEL:
+                raise ValueError(
+                    f"Chunk was embedded with {model_name}, expected {EMBEDDING_MODEL}"
+                )
+
+            dim = len(chunk["embedding"])
+            if expected_dim is not None and dim != expected_dim:
+                raise ValueError(
+                    f"Embedding dimension {dim} does not match {EMBEDDING_MODEL} ({expected_dim})"
+                )
+
+    @staticmethod
+    def chunk_id(chunk):
+        """Stable ID for a chunk, computed if the chunker didn't record one"""
+        metadata = chunk["metadata"]
+        if "chunk_id" not in metadata:
+            metadata["chunk_id"] = make_chunk_id(
+                metadata.get("doc_id"), metadata.get("chunk_index"), chunk["text"]
+            )
+        return metadata["chunk_id"]
+
+    def get_stored_ids(self):
+        """IDs of every chunk currently in the store"""
+        if self.backend in ("numpy", "ivf"):
+            return set(self.db.ids)
+        return set(self.db._collection.get(include=[])["ids"])
+
+    def get_stored_metadata(self):
+        """{chunk id: metadata} for every chunk currently in the store"""
+        ids, _, metadatas = self._all_chunks(include_texts=False)
+        return dict(zip(ids, metadatas))
+
+    def add_embeddings(self, chunks, batch_size=1000, flush=True):
+        """Upsert chunks with precomputed embeddings, without re-embedding them
+
+        With flush=False the index file isn't rewritten until flush() is called,
+        so callers writing many batches pay for one save instead of one each.
+        """
+        self._validate_embeddings(chunks)
+
+        # write straight to the underlying collection so Chroma skips embedding;
+        # stable IDs make repeated ingests overwrite rather than duplicate
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start : start + batch_size]
+            self._collection().upsert(
+                ids=[self.chunk_id(chunk) for chunk in batch],
+                embeddings=[chunk["embedding"] for chunk in batch],
+                documents=[chunk["text"] for chunk in batch],
+                metadatas=[chunk["metadata"] for chunk in batch],
+            )
+        self._written(flush)
+        logger.info(f"Upserted {len(chunks)} precomputed embeddings to vector store")
+
+    def update_metadata(self, chunks, batch_size=1000, flush=True):
+        """Rewrite the metadata of stored chunks whose text hasn't changed"""
+        ids = [self.chunk_id(chunk) for chunk in chunks]
+        if self.backend in ("numpy", "ivf"):
+            for chunk_id, chunk in zip(ids, chunks):
+                self.db.metadatas[self.db._positions[chunk_id]] = chunk["metadata"]
+        else:
+            for start in range(0, len(chunks), batch_size):
+                self.db._collection.update(
+                    ids=ids[start : start + batch_size],
+                    metadatas=[
+                        chunk["metadata"]
+                        for chunk in chunks[start : start + batch_size]
+                    ],
+                )
+        self._written(flush)
+        logger.info(f"Updated metadata of {len(chunks)} chunks in vector store")
+
+    def delete_ids(self, ids, batch_size=1000, flush=True):
+        """Remove chunks from the store by ID"""
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            self._collection().delete(ids=ids[start : start + batch_size])
+        self._written(flush)
+        logger.info(f"Deleted {len(ids)} chunks from vector store")
+
+    def sync(self, chunks, embedder=None):
+        """Make the store match chunks, touching only what changed"""
+        desired = {self.chunk_id(chunk): chunk for chunk in chunks}
+        stored = self.get_stored_ids()
+
+        # content hashes are part of the ID, so a changed chunk is new + stale
+        to_upsert = [
+            chunk for chunk_id, chunk in desired.items() if chunk_id not in stored
+        ]
+        stale = stored - desired.keys()
+
+        # unchanged text keeps its ID, but the article's facets may have moved
+        stored_metadata = self.get_stored_metadata()
+        retagged = [
+            chunk
+            for chunk_id, chunk in desired.items()
+            if chunk_id in stored and stored_metadata[chunk_id] != chunk["metadata"]
+        ]
+
+        # embed only the new chunks if vectors weren't supplied
+        needs_vectors = [chunk for chunk in to_upsert if "embedding" not in chunk]
+        if needs_vectors:
+            if embedder is None:
+                raise ValueError(
+                    f"{len(needs_vectors)} new chunks have no embeddings and no embedder was given"
+                )
+            vectors = embedder.embed_texts([chunk["text"] for chunk in needs_vectors])
+            for chunk, vector in zip(needs_vectors, vectors):
+                chunk["embedding"] = vector
+                chunk["embedding_model"] = embedder.model_name
+
+        # save once for the whole sync rather than after each step
+        if to_upsert:
+            self.add_embeddings(to_upsert, flush=False)
+        if stale:
+            self.delete_ids(stale, flush=False)
+        if retagged:
+            self.update_metadata(retagged, flush=False)
+        self.flush()
+
+        summary = {
+            "upserted": len(to_upsert),
+            "deleted": len(stale),
+            "retagged": len(retagged),
+            "unchanged": len(desired) - len(to_upsert) - len(retagged),
+        }
+        logger.info(
+            f"Synced vector store: {summary['upserted']} upserted, "
+            f"{summary['deleted']} deleted, {summary['retagged']} retagged, "
+            f"{summary['unchanged']} unchanged"
+        )
+        return summary
+
+    def load_from_embeddings_file(self, embeddings_path=None):
+        """Load chunks with precomputed embeddings (.npy store or JSON)"""
+        if embeddings_path is None:
+            root = Path(__file__).resolve().parent.parent
+            embeddings_path = os.path.join(root, "data/embeddings/embeddings.npy")
+            if not os.path.exists(embeddings_path):
+                embeddings_path = os.path.join(
+                    root, "data/embeddings/chunks_with_embeddings.json"
+                )
+
+        if embeddings_path.endswith(".npy"):
+            chunks = list(EmbeddingStore.load(embeddings_path).chunks())
+        else:
+            with open(embeddings_path, "r") as f:
+                chunks = json.load(f)
+
+        self.add_embeddings(chunks)
+        return len(chunks)
+
     def load_from_chunks_file(self, chunks_path=None):
         """Load embedding chunks from JSON to the vector store"""
         if chunks_path is None:
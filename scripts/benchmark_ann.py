@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.embedding_store import EmbeddingStore
+from database.cache import EmbeddingCache
+from database.embeddings import Embeddings
+from rag.numpy_index import NumpyIndex
+from rag.ivf_index import IVFIndex
+from rag.constants import EMBEDDING_MODEL
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def load_query_vectors(root, store, n_synthetic=200):
+    """Embed the eval questions (cached), or fall back to perturbed chunks offline"""
+    with open(os.path.join(root, "data/evals/eval_dataset.json"), "r") as f:
+        questions = [item["question"] for item in json.load(f)]
+
+    if os.environ.get("OPENAI_API_KEY"):
+        cache = EmbeddingCache(
+            os.path.join(root, "data/embeddings/embedding_cache.sqlite3")
+        )
+        embedder = Embeddings(model_name=EMBEDDING_MODEL, cache=cache)
+        eval_vectors = np.asarray(embedder.embed_texts(questions), dtype=np.float32)
+    else:
+        logger.warning("No OPENAI_API_KEY, using only synthetic queries")
+        eval_vectors = np.empty((0, store.dim), dtype=np.float32)
+
+    rng = np.random.default_rng(1)
+    base = np.asarray(store.vectors)[rng.integers(0, len(store), n_synthetic)]
+    synthetic = base + rng.normal(0, 0.02, base.shape).astype(np.float32)
+    return np.vstack([eval_vectors, synthetic])
+
+
+def scale_corpus(vectors, size, noise=0.02, seed=0):
+    """Grow the real corpus with noisy copies of its vectors"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), size)
+    scaled = vectors[picks] + rng.normal(0, noise, (size, vectors.shape[1]))
+    return scaled.astype(np.float32)
+
+
+def build(index_cls, vectors, **kwargs):
+    index = index_cls(dim=vectors.shape[1], **kwargs)
+    ids = [str(i) for i in range(len(vectors))]
+    index.upsert(ids, vectors, ids, [{} for _ in ids])
+    return index
+
+
+def run_benchmark(store, queries, sizes, probes, k):
+    results = []
+    for size in sizes:
+        vectors = np.asarray(store.vectors) if size == len(store) else None
+        if vectors is None:
+            vectors = scale_corpus(np.asarray(store.vectors), size)
+
+        exact = build(NumpyIndex, vectors)
+        truth, _ = exact.search_by_vectors(queries, k)
+
+        start = time.perf_counter()
+        ivf = build(IVFIndex, vectors)
+        ivf.train()
+        build_seconds = time.perf_counter() - start
+
+        for n_probe in probes + [None]:
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                if n_probe is None:
+                    rows, _ = exact.search_by_vectors(query, k)
+                else:
+                    rows, _ = ivf.search_by_vectors(query, k, n_probe=n_probe)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(set(rows[0]) & set(expected))
+
+            latencies = np.array(latencies)
+            results.append(
+                {
+                    "corpus": size,
+                    "lists": len(ivf.centroids),
+                    "n_probe": n_probe if n_probe is not None else "exact",
+                    "recall": hits / (len(queries) * k),
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p99_ms": float(np.percentile(latencies, 99)),
+                    "build_s": build_seconds,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="ANN recall@k vs latency")
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=os.path.join(root, "data/embeddings/embeddings.npy"),
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 10_000, 100_000])
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("-k", type=int, default=6)
+    args = parser.parse_args()
+
+    store = EmbeddingStore.load(args.store)
+    queries = load_query_vectors(root, store)
+    sizes = [size or len(store) for size in args.sizes]  # 0 = the real corpus
+
+    print(
+        f"{'corpus':>8} {'lists':>6} {'probes':>7} {'recall@k':>9} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'build s':>8}"
+    )
+    for row in run_benchmark(store, queries, sizes, args.probes, args.k):
+        print(
+            f"{row['corpus']:>8} {row['lists']:>6} {str(row['n_probe']):>7} "
+            f"{row['recall']:>9.3f} {row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f} "
+            f"{row['build_s']:>8.2f}"
+        )
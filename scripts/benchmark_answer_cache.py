@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.answer_cache import SemanticAnswerCache
+from rag.embedding_client import CachedQueryEmbeddings
+from rag.llm import RAG
+from rag.retriever import Retriever
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeChatModel, FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def paraphrase(question, rng):
+    """Cheap near-duplicates: reordered words, casing, punctuation and filler"""
+    words = question.rstrip("?").split()
+    style = rng.integers(4)
+    if style == 1:
+        return question.lower() + "?"
+    if style == 2:
+        return "please tell me " + question
+    if style == 3:
+        rng.shuffle(words)
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark RAG answers with and without the semantic answer cache"
+    )
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=6)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/evals/eval_dataset.json"), "r") as f:
+        questions = [item["question"] for item in json.load(f)]
+
+    rng = np.random.default_rng(0)
+    traffic = [
+        paraphrase(questions[i], rng)
+        for i in rng.integers(0, len(questions), args.requests)
+    ]
+
+    print(
+        f"{args.requests} requests paraphrasing {len(questions)} questions, "
+        f"{args.llm_latency * 1000:.0f}ms simulated LLM latency\n"
+    )
+    print(
+        f"{'mode':>10} {'llm calls':>10} {'hit rate':>9} "
+        f"{'hit p50 ms':>11} {'miss p50 ms':>12} {'total s':>8}"
+    )
+
+    for mode in ("uncached", "cached"):
+        embeddings = CachedQueryEmbeddings(
+            FakeEmbeddings(request_latency=0.05, bag_of_words=True)
+        )
+        store = VectorStore(backend="numpy", embedding_function=embeddings)
+        llm = FakeChatModel(response_latency=args.llm_latency)
+        cache = SemanticAnswerCache(threshold=args.threshold)
+        rag = RAG(llm=llm, retriever=Retriever(vector_store=store), answer_cache=cache)
+
+        hits, misses = [], []
+        start = time.perf_counter()
+        for query in traffic:
+            calls_before = llm.call_count
+            query_start = time.perf_counter()
+            rag.answer_question(query, k=args.k, use_cache=mode == "cached")
+            elapsed = (time.perf_counter() - query_start) * 1000
+            (misses if llm.call_count > calls_before else hits).append(elapsed)
+        total = time.perf_counter() - start
+
+        hit_p50 = np.percentile(hits, 50) if hits else float("nan")
+        print(
+            f"{mode:>10} {llm.call_count:>10} {len(hits) / len(traffic):>9.1%} "
+            f"{hit_p50:>11.2f} {np.percentile(misses, 50):>12.2f} {total:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
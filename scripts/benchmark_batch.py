@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.embedding_client import CachedQueryEmbeddings
+from rag.llm import RAG
+from rag.retriever import Retriever
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeChatModel, FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def offline_questions(root, n, repeat_share, seed=0):
+    """Eval questions and article titles, with a share asked more than once"""
+    with open(os.path.join(root, "data/evals/eval_dataset.json"), "r") as f:
+        questions = [item["question"] for item in json.load(f)]
+    with open(os.path.join(root, "data/processed/articles.json"), "r") as f:
+        titles = [article["title"] for article in json.load(f)]
+    # a few phrasings per title, so there are enough distinct questions
+    for template in ("{}", "Can you explain: {}", "{} I'm a new patient."):
+        questions += [template.format(title) for title in titles]
+
+    rng = np.random.default_rng(seed)
+    distinct = max(1, round(n * (1 - repeat_share)))
+    picks = rng.choice(len(questions), min(distinct, len(questions)), replace=False)
+    asked = [questions[i] for i in picks]
+    return [asked[i] for i in rng.integers(0, len(asked), n - len(asked))] + asked
+
+
+def build_rag(backend, embedding_latency, llm_latency):
+    embeddings = FakeEmbeddings(request_latency=embedding_latency, bag_of_words=True)
+    store = VectorStore(
+        backend=backend, embedding_function=CachedQueryEmbeddings(embeddings)
+    )
+    llm = FakeChatModel(response_latency=llm_latency)
+    rag = RAG(llm=llm, retriever=Retriever(vector_store=store))
+    return rag, embeddings, llm
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline question answering: answer_question in a loop vs answer_batch"
+    )
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--repeat-share", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "ivf"])
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=6)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    queries = offline_questions(root, args.queries, args.repeat_share)
+    print(
+        f"{len(queries)} questions ({len(set(queries))} distinct), "
+        f"{args.embedding_latency * 1000:.0f}ms simulated embedding latency, "
+        f"{args.llm_latency * 1000:.0f}ms simulated LLM latency\n"
+    )
+    print(
+        f"{'mode':>22} {'seconds':>8} {'queries/s':>10} "
+        f"{'embed calls':>12} {'llm calls':>10} {'contexts':>9}"
+    )
+
+    rag, embeddings, llm = build_rag(
+        args.backend, args.embedding_latency, args.llm_latency
+    )
+    start = time.perf_counter()
+    # the semantic answer cache is left out of both, to compare the batching itself
+    looped = [
+        rag.answer_question(query, k=args.k, use_cache=False) for query in queries
+    ]
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'answer_question loop':>22} {elapsed:>8.2f} {len(queries) / elapsed:>10.1f} "
+        f"{embeddings.request_count:>12} {llm.call_count:>10} {len(queries):>9}"
+    )
+
+    for concurrency in args.concurrency:
+        rag, embeddings, llm = build_rag(
+            args.backend, args.embedding_latency, args.llm_latency
+        )
+        batched = rag.answer_batch(
+            queries, k=args.k, use_cache=False, max_concurrency=concurrency
+        )
+        stats = rag.batch_stats
+        # same questions, same order, same retrieved chunks as the loop
+        assert [r["question"] for r in batched] == queries
+        assert all(
+            [d["metadata"]["chunk_id"] for d in a["context"]]
+            == [d["metadata"]["chunk_id"] for d in b["context"]]
+            for a, b in zip(looped, batched)
+        )
+        print(
+            f"{f'answer_batch, {concurrency} calls':>22} {stats['seconds']:>8.2f} "
+            f"{stats['queries_per_second']:>10.1f} {embeddings.request_count:>12} "
+            f"{llm.call_count:>10} {stats['distinct_contexts']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
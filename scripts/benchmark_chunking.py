@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.chunking import DocumentChunker, SentenceChunker, sentence_spans
+from rag.constants import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
+from rag.tokens import count_tokens
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.ERROR)
+
+
+def synthetic_articles(articles, n, seed=0):
+    """n articles of 5-40 sentences drawn from the real help centre sentences"""
+    sentences = [
+        article["body"][start:end].strip()
+        for article in articles
+        for start, end in sentence_spans(article["body"])
+    ]
+    sentences = [s for s in sentences if s]
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for i in range(n):
+        picks = rng.integers(0, len(sentences), rng.integers(5, 41))
+        corpus.append(
+            {
+                "id": i,
+                "title": f"Synthetic article {i}",
+                "url": f"https://example.com/{i}",
+                "body": " ".join(sentences[p] for p in picks),
+            }
+        )
+    return corpus
+
+
+def describe(chunks):
+    """Mean tokens per chunk and share of chunks ending on a sentence"""
+    tokens = [count_tokens(chunk["text"]) for chunk in chunks]
+    sentence_ends = sum(chunk["text"].rstrip()[-1:] in ".!?" for chunk in chunks)
+    return np.mean(tokens), np.max(tokens), sentence_ends / len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chunking throughput: LangChain recursive splitter vs sentence chunker"
+    )
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1]
+    )
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/processed/articles.json"), "r") as f:
+        corpus = synthetic_articles(json.load(f), args.articles)
+    size_mb = sum(len(article["body"]) for article in corpus) / 1e6
+    print(f"{len(corpus)} synthetic articles, {size_mb:.0f}M characters\n")
+    print(
+        f"{'chunker':>28} {'seconds':>8} {'articles/s':>11} {'chunks':>8} "
+        f"{'mean tok':>9} {'max tok':>8} {'sentence end':>13}"
+    )
+
+    chunkers = [
+        (
+            f"recursive {CHUNK_SIZE}:{CHUNK_OVERLAP} chars",
+            DocumentChunker(CHUNK_SIZE, CHUNK_OVERLAP),
+        )
+    ]
+    for workers in dict.fromkeys(args.workers):
+        chunkers.append(
+            (
+                f"sentence {CHUNK_TOKENS}:{CHUNK_OVERLAP_TOKENS} tok, {workers}p",
+                SentenceChunker(CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, workers=workers),
+            )
+        )
+
+    for label, chunker in chunkers:
+        start = time.perf_counter()
+        chunks = chunker.chunk_documents(corpus)
+        elapsed = time.perf_counter() - start
+        mean_tokens, max_tokens, sentence_end = describe(chunks)
+        print(
+            f"{label:>28} {elapsed:>8.1f} {len(corpus) / elapsed:>11.0f} "
+            f"{len(chunks):>8} {mean_tokens:>9.0f} {max_tokens:>8} "
+            f"{sentence_end:>13.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
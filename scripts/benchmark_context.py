@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.chunking import DocumentChunker
+from rag.constants import CHUNK_SIZE, CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET
+from rag.prompts import format_context
+from rag.retriever import Retriever
+from rag.tokens import count_tokens
+from scripts.benchmark_retrieval import (
+    build_store,
+    eval_questions,
+    load_query_sets,
+    vector_source,
+)
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def concatenated_context(context_docs):
+    """The previous format_context: every chunk in full, one source each"""
+    return "\n".join(
+        f"source {i+1}: {doc['metadata'].get('title', 'untitled')}\n{doc['content']}\n"
+        for i, doc in enumerate(context_docs)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prompt context tokens: full concatenation vs budgeted assembly"
+    )
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 6, 10])
+    parser.add_argument(
+        "--budgets",
+        type=int,
+        nargs="+",
+        default=[CONTEXT_TOKEN_BUDGET, 1000],
+        help="context token budgets to compare",
+    )
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/processed/articles.json"), "r") as f:
+        articles = json.load(f)
+
+    chunks = DocumentChunker(CHUNK_SIZE, CHUNK_OVERLAP).chunk_documents(articles)
+    texts = [item["question"] for item in eval_questions(root)]
+    source = vector_source(root, texts + [chunk["text"] for chunk in chunks])
+    vectors = source.get([chunk["text"] for chunk in chunks])
+    if vectors is None:
+        sys.exit("chunks are not embedded; run create_embeddings.py first")
+    for chunk, vector in zip(chunks, vectors):
+        chunk["embedding"] = vector
+
+    print(
+        f"{'queries':>8} {'k':>3} {'budget':>7} {'full tokens':>12} "
+        f"{'packed':>7} {'saved':>6} {'chunks kept':>12} {'build ms':>9}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store, _ = build_store("numpy", chunks, tmp_dir)
+        retriever = Retriever(vector_store=store)
+
+        for name, queries in load_query_sets(root, articles, source).items():
+            for k in args.k:
+                contexts = [
+                    retriever.format_retrieved_documents(
+                        retriever.search(text, vector.tolist(), k=k)
+                    )
+                    for text, vector, _, _ in queries
+                ]
+                full = [count_tokens(concatenated_context(c)) for c in contexts]
+
+                for budget in args.budgets:
+                    packed, kept, timings = [], [], []
+                    for context_docs in contexts:
+                        start = time.perf_counter()
+                        context = format_context(context_docs, token_budget=budget)
+                        timings.append((time.perf_counter() - start) * 1000)
+                        packed.append(count_tokens(context))
+                        kept.append(
+                            sum(doc["content"][-50:] in context for doc in context_docs)
+                            / len(context_docs)
+                        )
+                    saved = 1 - sum(packed) / sum(full)
+                    print(
+                        f"{name:>8} {k:>3} {budget:>7} {np.mean(full):>12.0f} "
+                        f"{np.mean(packed):>7.0f} {saved:>6.1%} "
+                        f"{np.mean(kept):>12.1%} {np.median(timings):>9.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
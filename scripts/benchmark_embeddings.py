@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.embeddings import Embeddings
+from scripts.fakes import FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("database").setLevel(logging.WARNING)
+
+
+def load_chunk_texts(repeat=1):
+    """Load chunk texts, optionally repeated to simulate a larger corpus"""
+    chunks_file = os.path.join(
+        Path(__file__).resolve().parent.parent, "data/processed/chunks.json"
+    )
+    with open(chunks_file, "r") as f:
+        chunks = json.load(f)
+    return [chunk["text"] for chunk in chunks] * repeat
+
+
+def run_benchmark(texts, batch_sizes, worker_counts, latency):
+    """Time the embedding pipeline against a fake backend for each setting"""
+    results = []
+    for batch_size in batch_sizes:
+        for max_workers in worker_counts:
+            backend = FakeEmbeddings(dimensions=64, request_latency=latency)
+            embeddings = Embeddings(
+                embedding_model=backend,
+                batch_size=batch_size,
+                max_workers=max_workers,
+            )
+
+            start = time.perf_counter()
+            vectors = embeddings.embed_texts(texts)
+            elapsed = time.perf_counter() - start
+
+            assert len(vectors) == len(texts)
+            results.append(
+                {
+                    "batch_size": batch_size,
+                    "max_workers": max_workers,
+                    "requests": backend.request_count,
+                    "seconds": elapsed,
+                    "chunks_per_sec": len(texts) / elapsed,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding")
+    parser.add_argument("--repeat", type=int, default=4, help="Corpus multiplier")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Fake request latency (s)"
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    texts = load_chunk_texts(args.repeat)
+    print(f"Embedding {len(texts)} chunks (fake latency {args.latency}s/request)")
+    print(f"{'batch':>6} {'workers':>8} {'requests':>9} {'seconds':>8} {'chunks/s':>9}")
+    for row in run_benchmark(texts, args.batch_sizes, args.workers, args.latency):
+        print(
+            f"{row['batch_size']:>6} {row['max_workers']:>8} {row['requests']:>9} "
+            f"{row['seconds']:>8.2f} {row['chunks_per_sec']:>9.1f}"
+        )
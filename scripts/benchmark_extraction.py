@@ -0,0 +1,113 @@
+import sys
+import time
+import logging
+import tempfile
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.get_data import VoyZendeskAPI
+from scripts.fake_zendesk import FakeZendeskServer
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("api").setLevel(logging.ERROR)
+
+
+def run_concurrency_benchmark(latency, worker_counts, rate_limit_delay, throttle_every):
+    """Time full extractions at different worker counts"""
+    results = []
+    for max_workers in worker_counts:
+        server = FakeZendeskServer(latency=latency, throttle_every=throttle_every)
+        server.start()
+        try:
+            api = VoyZendeskAPI(
+                rate_limit_delay=rate_limit_delay,
+                base_url=server.base_url,
+                max_workers=max_workers,
+            )
+            start = time.perf_counter()
+            articles = api.extract_all_articles(save_raw=False)
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "max_workers": max_workers,
+                    "articles": len(articles),
+                    "requests": server.request_count,
+                    "throttled": server.throttled_count,
+                    "seconds": elapsed,
+                }
+            )
+        finally:
+            server.stop()
+    return results
+
+
+def run_incremental_benchmark(latency):
+    """Compare a full extraction with a no-change incremental refresh"""
+    server = FakeZendeskServer(latency=latency).start()
+    raw_dir = tempfile.mkdtemp()
+    results = []
+
+    try:
+        api = VoyZendeskAPI(rate_limit_delay=0.0, base_url=server.base_url)
+
+        start = time.perf_counter()
+        articles = api.extract_all_articles(save_raw=True, raw_dir=raw_dir)
+        results.append(
+            ("full", len(articles), server.request_count, time.perf_counter() - start)
+        )
+
+        server.reset_count()
+        start = time.perf_counter()
+        since = api.get_high_water_mark(raw_dir)
+        updated = api.extract_updated_articles(since, save_raw=True, raw_dir=raw_dir)
+        api.get_article_ids()  # deletion check
+        results.append(
+            (
+                "incremental",
+                len(updated),
+                server.request_count,
+                time.perf_counter() - start,
+            )
+        )
+    finally:
+        server.stop()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Zendesk extraction")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Fake server latency (s)"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument(
+        "--rate-limit-delay",
+        type=float,
+        default=0.01,
+        help="Client request spacing (s)",
+    )
+    parser.add_argument(
+        "--throttle-every", type=int, default=0, help="Fake a 429 every N requests"
+    )
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'articles':>9} {'requests':>9} {'seconds':>8}")
+    for mode, count, requests_made, seconds in run_incremental_benchmark(args.latency):
+        print(f"{mode:<12} {count:>9} {requests_made:>9} {seconds:>8.2f}")
+
+    print()
+    print(f"{'workers':>8} {'articles':>9} {'requests':>9} {'429s':>5} {'seconds':>8}")
+    for row in run_concurrency_benchmark(
+        args.latency, args.workers, args.rate_limit_delay, args.throttle_every
+    ):
+        print(
+            f"{row['max_workers']:>8} {row['articles']:>9} {row['requests']:>9} "
+            f"{row['throttled']:>5} {row['seconds']:>8.2f}"
+        )
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.embedding_store import EmbeddingStore
+from rag.facets import FacetIndex
+from rag.numpy_index import NumpyIndex
+from scripts.benchmark_ann import build, scale_corpus
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def scaled_store(store, size, seed=0):
+    """Noisy copies of the real vectors, each keeping its source chunk's metadata"""
+    vectors = np.asarray(store.vectors)
+    if size == len(store):
+        return vectors, [record["metadata"] for record in store.records]
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(store), size)
+    scaled = vectors[picks] + rng.normal(0, 0.02, (size, vectors.shape[1]))
+    return scaled.astype(np.float32), [store.records[p]["metadata"] for p in picks]
+
+
+def timed(fn, queries):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), results
+
+
+def run_benchmark(store, sizes, k, n_queries):
+    rng = np.random.default_rng(1)
+    for size in sizes:
+        vectors, metadatas = scaled_store(store, size)
+        index = build(NumpyIndex, vectors)
+        facets = FacetIndex(metadatas)
+
+        for category, category_rows in sorted(facets.rows["category"].items()):
+            # queries near this category's chunks, asked with and without the filter
+            picks = category_rows[rng.integers(0, len(category_rows), n_queries)]
+            queries = scale_corpus(vectors[picks], n_queries, seed=2)[:, None, :]
+            wanted = set(category_rows.tolist())
+
+            full_ms, full = timed(
+                lambda q: index.search_by_vectors(q, k)[0][0], queries
+            )
+
+            def filtered_search(query):
+                rows = facets.select({"category": category})
+                return index.search_by_vectors(query, k, rows=rows)[0][0]
+
+            filtered_ms, filtered = timed(filtered_search, queries)
+            precision = np.mean([len(wanted & set(r)) / len(r) for r in full])
+            filtered_hits = sum(len(r) for r in filtered)
+            assert all(set(r) <= wanted for r in filtered)
+
+            yield {
+                "corpus": size,
+                "category": category,
+                "share": len(category_rows) / size,
+                "full_p50_ms": float(np.percentile(full_ms, 50)),
+                "full_precision": precision,
+                "filtered_p50_ms": float(np.percentile(filtered_ms, 50)),
+                "filtered_results": filtered_hits / len(filtered),
+            }
+
+
+if __name__ == "__main__":
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(
+        description="Category-filtered vs unfiltered vector search latency and precision"
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=os.path.join(root, "data/embeddings/embeddings.npy"),
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=6)
+    args = parser.parse_args()
+
+    store = EmbeddingStore.load(args.store)
+    sizes = [size or len(store) for size in args.sizes]  # 0 = the real corpus
+
+    print(
+        f"{'corpus':>8} {'category':>34} {'share':>6} {'full ms':>8} "
+        f"{'in category':>12} {'filtered ms':>12} {'results':>8}"
+    )
+    for row in run_benchmark(store, sizes, args.k, args.queries):
+        print(
+            f"{row['corpus']:>8} {row['category']:>34} {row['share']:>6.1%} "
+            f"{row['full_p50_ms']:>8.3f} {row['full_precision']:>12.1%} "
+            f"{row['filtered_p50_ms']:>12.3f} {row['filtered_results']:>8.1f}"
+        )
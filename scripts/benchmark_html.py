@@ -0,0 +1,115 @@
+import os
+import re
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.utils import clean_html, clean_html_many, extract_article_body
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("api").setLevel(logging.ERROR)
+
+
+def soup_clean_html(html_content):
+    """The previous clean_html, kept as the reference output"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    text = soup.get_text(separator=" ", strip=True)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def soup_extract_article_body(html_content):
+    """The previous extract_article_body: find the div, then parse it again"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    article_body = soup.find("div", class_="article-body")
+    return soup_clean_html(str(article_body if article_body else html_content))
+
+
+def as_page(body):
+    """Wrap an article body the way it sits in a help centre page"""
+    return (
+        "<html><head><title>Voy</title><style>p { margin: 0 }</style></head><body>"
+        "<nav><a href='/'>Help centre</a></nav>"
+        f"<article><div class='article-body'>{body}</div></article>"
+        "<footer><p>Still need help? Contact us</p></footer></body></html>"
+    )
+
+
+def throughput(label, fn, documents):
+    start = time.perf_counter()
+    fn(documents)
+    elapsed = time.perf_counter() - start
+    mb = sum(len(doc) for doc in documents) / 1e6
+    print(
+        f"{label:>34} {elapsed:>8.2f} {len(documents) / elapsed:>8.0f} "
+        f"{mb / elapsed:>7.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HTML cleaning throughput on data/raw: BeautifulSoup vs single pass"
+    )
+    parser.add_argument("--repeat", type=int, default=200, help="copies of data/raw")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    bodies = []
+    for path in sorted(glob.glob(os.path.join(root, "data/raw/article_*.json"))):
+        with open(path, "r") as f:
+            bodies.append(json.load(f).get("body", ""))
+    pages = [as_page(body) for body in bodies]
+
+    # the fast path must produce exactly what BeautifulSoup did
+    mismatches = sum(soup_clean_html(b) != clean_html(b) for b in bodies)
+    mismatches += sum(
+        soup_extract_article_body(p) != extract_article_body(p) for p in pages
+    )
+    print(
+        f"{len(bodies)} raw articles, {mismatches} outputs differ from BeautifulSoup\n"
+    )
+
+    bodies, pages = bodies * args.repeat, pages * args.repeat
+    print(f"{'cleaner':>34} {'seconds':>8} {'docs/s':>8} {'MB/s':>7}")
+    throughput(
+        "clean_html, BeautifulSoup",
+        lambda docs: [soup_clean_html(d) for d in docs],
+        bodies,
+    )
+    throughput("clean_html, single pass", clean_html_many, bodies)
+    throughput(
+        "clean_html, structure kept",
+        lambda docs: clean_html_many(docs, keep_structure=True),
+        bodies,
+    )
+    for workers in args.workers:
+        throughput(
+            f"clean_html, {workers} processes",
+            lambda docs: clean_html_many(docs, workers=workers),
+            bodies,
+        )
+    throughput(
+        "extract_article_body, BeautifulSoup",
+        lambda docs: [soup_extract_article_body(d) for d in docs],
+        pages,
+    )
+    throughput(
+        "extract_article_body, single pass",
+        lambda docs: [extract_article_body(d) for d in docs],
+        pages,
+    )
+
+
+if __name__ == "__main__":
+    main()
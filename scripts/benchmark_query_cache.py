@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.embedding_client import CachedQueryEmbeddings
+from rag.retriever import Retriever
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def make_traffic(questions, n_requests, n_distinct, seed=0):
+    """Zipf-skewed question stream with casing/whitespace variants, like FAQ traffic"""
+    rng = np.random.default_rng(seed)
+    pool = questions + [f"synthetic question {i}" for i in range(n_distinct)]
+    pool = pool[:n_distinct]
+
+    traffic = []
+    for rank in rng.zipf(1.3, n_requests):
+        question = pool[(rank - 1) % len(pool)]
+        variant = rng.integers(3)
+        if variant == 1:
+            question = question.lower() + "  "
+        elif variant == 2:
+            question = "  " + question.upper()
+        traffic.append(question)
+    return traffic
+
+
+def run(retriever, traffic, k):
+    latencies = []
+    for query in traffic:
+        start = time.perf_counter()
+        retriever.retrieve(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark retrieval with and without the query embedding cache"
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--distinct", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--k", type=int, default=6)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/evals/eval_dataset.json"), "r") as f:
+        questions = [item["question"] for item in json.load(f)]
+    traffic = make_traffic(questions, args.requests, args.distinct)
+
+    print(
+        f"{args.requests} requests over {args.distinct} distinct questions, "
+        f"{args.latency * 1000:.0f}ms simulated embedding latency\n"
+    )
+    print(f"{'mode':>10} {'requests':>9} {'hit rate':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for mode in ("uncached", "cached"):
+        fake = FakeEmbeddings(request_latency=args.latency)
+        client = fake if mode == "uncached" else CachedQueryEmbeddings(fake)
+        store = VectorStore(backend="numpy", embedding_function=client)
+        latencies = run(Retriever(vector_store=store), traffic, args.k)
+
+        hit_rate = getattr(client, "hit_rate", 0.0)
+        print(
+            f"{mode:>10} {fake.request_count:>9} {hit_rate:>9.1%} "
+            f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.chunking import DocumentChunker
+from rag.constants import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    RERANK_MODEL,
+    RERANK_CANDIDATES,
+    RERANK_BATCH_SIZE,
+)
+from rag.prompts import format_context
+from rag.reranker import CrossEncoderReranker
+from rag.retriever import Retriever
+from rag.tokens import count_tokens
+from scripts.benchmark_retrieval import (
+    build_store,
+    eval_questions,
+    load_query_sets,
+    vector_source,
+)
+from scripts.fakes import FakeReranker
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def make_reranker(args, batch_size):
+    if args.fake:
+        return FakeReranker(args.candidates, batch_size)
+    return CrossEncoderReranker(args.model, args.candidates, batch_size)
+
+
+def candidates_for(retriever, query, n):
+    """Top-n retrieval results, minus the chunk a title query was taken from"""
+    text, vector, _, exclude_text = query
+    results = retriever.search(text, vector.tolist(), k=n + 1)
+    return [(doc, s) for doc, s in results if doc.page_content != exclude_text][:n]
+
+
+def score(queries, ranked):
+    """Mean recall, MRR and prompt context tokens of the chosen chunks"""
+    recalls, reciprocal_ranks, tokens = [], [], []
+    for (_, _, expected, _), results in zip(queries, ranked):
+        doc_ids = [str(doc.metadata.get("doc_id")) for doc, _ in results]
+        recalls.append(len(expected & set(doc_ids)) / len(expected))
+        rank = next((i for i, d in enumerate(doc_ids, 1) if d in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        context = [
+            {"content": doc.page_content, "metadata": doc.metadata}
+            for doc, _ in results
+        ]
+        tokens.append(count_tokens(format_context(context)))
+    return np.mean(recalls), np.mean(reciprocal_ranks), np.mean(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark reranking over-fetched candidates down to K"
+    )
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=RERANK_CANDIDATES)
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[1, 8, RERANK_BATCH_SIZE]
+    )
+    parser.add_argument("--model", default=RERANK_MODEL)
+    parser.add_argument(
+        "--fake",
+        action="store_true",
+        help="word-overlap stand-in, for when sentence-transformers isn't installed",
+    )
+    args = parser.parse_args()
+    if args.fake:
+        print("fake reranker: latencies are simulated, quality is word overlap only")
+
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/processed/articles.json"), "r") as f:
+        articles = json.load(f)
+
+    chunks = DocumentChunker(CHUNK_SIZE, CHUNK_OVERLAP).chunk_documents(articles)
+    texts = [item["question"] for item in eval_questions(root)]
+    source = vector_source(root, texts + [chunk["text"] for chunk in chunks])
+    vectors = source.get([chunk["text"] for chunk in chunks])
+    if vectors is None:
+        sys.exit("chunks are not embedded; run create_embeddings.py first")
+    for chunk, vector in zip(chunks, vectors):
+        chunk["embedding"] = vector
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store, _ = build_store("numpy", chunks, tmp_dir)
+        retriever = Retriever(vector_store=store)
+
+        for name, queries in load_query_sets(root, articles, source).items():
+            top_k = [candidates_for(retriever, q, args.k) for q in queries]
+            pools = [candidates_for(retriever, q, args.candidates) for q in queries]
+
+            print(f"\n{name} ({len(queries)} queries), k={args.k}")
+            print(
+                f"{'context':>24} {'recall':>7} {'MRR':>6} {'tokens':>7} "
+                f"{'rerank p50 ms':>14} {'p99 ms':>7}"
+            )
+            for label, ranked in [
+                (f"retrieved top {args.k}", top_k),
+                (f"retrieved top {args.candidates}", pools),
+            ]:
+                recall, mrr, tokens = score(queries, ranked)
+                print(f"{label:>24} {recall:>7.3f} {mrr:>6.3f} {tokens:>7.0f}")
+
+            for batch_size in args.batch_sizes:
+                reranker = make_reranker(args, batch_size)
+                reranked = [
+                    reranker.rerank(q[0], pool, args.k)[0]
+                    for q, pool in zip(queries, pools)
+                ]
+                stats = reranker.stats()
+                recall, mrr, tokens = score(queries, reranked)
+                label = f"reranked to {args.k}, batch {batch_size}"
+                print(
+                    f"{label:>24} {recall:>7.3f} {mrr:>6.3f} {tokens:>7.0f} "
+                    f"{stats['p50_ms']:>14.1f} {stats['p99_ms']:>7.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
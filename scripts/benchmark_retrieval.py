@@ -0,0 +1,312 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.cache import EmbeddingCache, embedding_cache_key
+from database.chunking import DocumentChunker
+from database.embedding_store import EmbeddingStore
+from database.embeddings import Embeddings
+from rag.constants import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL, LEXICAL_WEIGHT
+from rag.numpy_index import normalise_rows
+from rag.retriever import Retriever
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("database").setLevel(logging.WARNING)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+# labelled eval question vectors, written on the first run with an API key
+EVAL_VECTORS = "data/evals/eval_question_embeddings.npz"
+
+
+class VectorSource:
+    def __init__(self, root):
+        """Look up vectors offline: the embeddings files first, then the cache"""
+        store = EmbeddingStore.load(
+            os.path.join(root, "data/embeddings/embeddings.npy")
+        )
+        self.known = {
+            record["text"]: vector
+            for record, vector in zip(store.records, store.vectors)
+        }
+        self.eval_path = os.path.join(root, EVAL_VECTORS)
+        if os.path.exists(self.eval_path):
+            saved = np.load(self.eval_path)
+            self.known.update(zip(saved["texts"].tolist(), saved["vectors"]))
+        self.cache = EmbeddingCache(
+            os.path.join(root, "data/embeddings/embedding_cache.sqlite3")
+        )
+        # with a key, missing texts are embedded once and cached for offline reruns
+        self.embedder = None
+        if os.environ.get("OPENAI_API_KEY"):
+            self.embedder = Embeddings(model_name=EMBEDDING_MODEL, cache=self.cache)
+
+    def cached(self, texts):
+        """{text: vector} for every text available without calling the API"""
+        vectors = {text: self.known[text] for text in texts if text in self.known}
+        missing = [text for text in texts if text not in vectors]
+        if missing:
+            keys = [embedding_cache_key(EMBEDDING_MODEL, text) for text in missing]
+            found = self.cache.get_many(keys)
+            for key, text in zip(keys, missing):
+                if key in found:
+                    vectors[text] = found[key]
+        return vectors
+
+    def get(self, texts):
+        """Vectors for texts, or None if any are unavailable offline"""
+        vectors = self.cached(texts)
+        missing = [text for text in texts if text not in vectors]
+        if missing and self.embedder is not None:
+            vectors.update(zip(missing, self.embedder.embed_texts(missing)))
+        elif missing:
+            logger.warning(
+                f"{len(missing)} of {len(texts)} texts have no cached vector; "
+                f"set OPENAI_API_KEY once to embed and cache them"
+            )
+            return None
+        return np.asarray([vectors[text] for text in texts], dtype=np.float32)
+
+    def save_eval_vectors(self, texts, vectors):
+        """Ship the eval question vectors with the repo so later runs need no key"""
+        np.savez(self.eval_path, texts=np.asarray(texts), vectors=vectors)
+        logger.warning(f"Saved {len(texts)} eval question vectors to {self.eval_path}")
+
+
+class LocalVectorSource:
+    def __init__(self):
+        """Bag-of-words stand-in embeddings for everything: no network, no files
+
+        Recall is comparable between rows of one run (chunking, backends,
+        lexical weights), but not with runs on the real embedding model.
+        """
+        # a random vector per word; a text is the normalised sum of its words
+        self.embedder = FakeEmbeddings(request_latency=0)
+        self.words = {}
+
+    def cached(self, texts):
+        return dict(zip(texts, self.get(texts)))
+
+    def get(self, texts):
+        words = [re.findall(r"\w+", text.lower()) or [""] for text in texts]
+        new = sorted({word for text in words for word in text} - set(self.words))
+        if new:
+            vectors = np.asarray(self.embedder.embed_documents(new), dtype=np.float32)
+            self.words.update(zip(new, vectors))
+        summed = np.vstack(
+            [np.sum([self.words[word] for word in text], axis=0) for text in words]
+        )
+        return normalise_rows(summed)
+
+
+def vector_source(root, texts, embedder="auto"):
+    """Real vectors if every text has one (or can be embedded), else local ones
+
+    All vectors in a run come from one source, so queries and chunks share a
+    space.
+    """
+    if embedder == "local":
+        return LocalVectorSource()
+    source = VectorSource(root)
+    if embedder == "openai" or source.embedder is not None:
+        return source
+    missing = len(set(texts)) - len(source.cached(list(set(texts))))
+    if not missing:
+        return source
+    print(
+        f"{missing} texts have no real vector offline; using local bag-of-words "
+        f"embeddings for the whole run (set OPENAI_API_KEY once to embed them)\n"
+    )
+    return LocalVectorSource()
+
+
+def eval_questions(root):
+    with open(os.path.join(root, "data/evals/eval_dataset.json"), "r") as f:
+        return [item for item in json.load(f) if item.get("expected_doc_ids")]
+
+
+def load_query_sets(root, articles, source):
+    """Labelled eval questions (if their vectors are available) plus article titles"""
+    query_sets = {}
+
+    labelled = eval_questions(root)
+    questions = [item["question"] for item in labelled]
+    saved = isinstance(source, VectorSource) and set(questions) <= set(source.known)
+    vectors = source.get(questions)
+    if vectors is not None:
+        if isinstance(source, VectorSource) and not saved:
+            source.save_eval_vectors(questions, vectors)
+        query_sets["eval"] = [
+            (item["question"], vector, {str(d) for d in item["expected_doc_ids"]}, None)
+            for item, vector in zip(labelled, vectors)
+        ]
+
+    # each article's title should retrieve that article's body; the title chunk
+    # itself is excluded so the query can't just find itself. Titles with no
+    # vector (never chunked on their own, for real embeddings) are left out
+    titles = {f"TITLE: {article['title']}": article for article in articles}
+    vectors = source.cached(list(titles))
+    if vectors:
+        query_sets["titles"] = [
+            (
+                titles[title]["title"],
+                np.asarray(vector, dtype=np.float32),
+                {str(titles[title]["id"])},
+                title,
+            )
+            for title, vector in vectors.items()
+        ]
+    return query_sets
+
+
+def build_store(backend, chunks, tmp_dir):
+    """Build and persist an index from scratch, returning it and the build time"""
+    name = f"{backend}-{time.perf_counter_ns()}"
+    start = time.perf_counter()
+    store = VectorStore(
+        backend=backend,
+        embedding_function=FakeEmbeddings(request_latency=0),  # queries are vectors
+        index_path=os.path.join(tmp_dir, f"{name}.npy"),
+        persist_directory=os.path.join(tmp_dir, name),
+    )
+    store.add_embeddings(chunks)
+    return store, time.perf_counter() - start
+
+
+def evaluate(retriever, queries, k):
+    """Mean recall@k, MRR@k and per-query latencies (ms) over a query set"""
+    recalls, reciprocal_ranks, latencies = [], [], []
+    for text, vector, expected, exclude_text in queries:
+        start = time.perf_counter()
+        results = retriever.search(text, vector.tolist(), k=k + 1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        docs = [doc for doc, _ in results if doc.page_content != exclude_text][:k]
+        doc_ids = [str(doc.metadata.get("doc_id")) for doc in docs]
+        recalls.append(len(expected & set(doc_ids)) / len(expected))
+        rank = next((i for i, d in enumerate(doc_ids, 1) if d in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    return np.mean(recalls), np.mean(reciprocal_ranks), np.array(latencies)
+
+
+def parse_chunking(value):
+    size, overlap = value.split(":")
+    return int(size), int(overlap)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline retrieval benchmark: recall@k, MRR, latency, build time"
+    )
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 6, 10])
+    parser.add_argument(
+        "--chunking",
+        type=parse_chunking,
+        nargs="+",
+        default=[(CHUNK_SIZE, CHUNK_OVERLAP), (500, 100), (1500, 300)],
+        help="chunk_size:chunk_overlap settings to sweep",
+    )
+    parser.add_argument("--backends", nargs="+", default=["numpy", "ivf", "chroma"])
+    parser.add_argument(
+        "--lexical-weights",
+        type=float,
+        nargs="+",
+        default=[0.0, LEXICAL_WEIGHT],
+        help="BM25 fusion weights to sweep; 0 is dense-only",
+    )
+    parser.add_argument(
+        "--embedder",
+        choices=["auto", "openai", "local"],
+        default="auto",
+        help="auto uses real vectors when all are available offline or with a key",
+    )
+    parser.add_argument("--output", help="also write the rows as JSON")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/processed/articles.json"), "r") as f:
+        articles = json.load(f)
+
+    chunkings = {
+        (size, overlap): DocumentChunker(size, overlap).chunk_documents(articles)
+        for size, overlap in args.chunking
+    }
+    texts = [item["question"] for item in eval_questions(root)]
+    texts += [chunk["text"] for chunks in chunkings.values() for chunk in chunks]
+    source = vector_source(root, texts, args.embedder)
+    embedder = "local" if isinstance(source, LocalVectorSource) else "openai"
+    query_sets = load_query_sets(root, articles, source)
+    print(
+        f"embeddings: {embedder}, query sets: "
+        + ", ".join(f"{name} ({len(q)})" for name, q in query_sets.items())
+        + "\n"
+    )
+    print(
+        f"{'chunking':>10} {'backend':>8} {'build s':>8} {'lexical':>8} "
+        f"{'queries':>8} {'k':>3} "
+        f"{'recall@k':>9} {'MRR':>6} {'p50 ms':>7} {'p99 ms':>7}"
+    )
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for (chunk_size, chunk_overlap), chunks in chunkings.items():
+            label = f"{chunk_size}:{chunk_overlap}"
+            vectors = source.get([chunk["text"] for chunk in chunks])
+            if vectors is None:
+                print(f"{label:>10} skipped: chunks not embedded for this setting")
+                continue
+            for chunk, vector in zip(chunks, vectors):
+                chunk["embedding"] = vector
+
+            for backend in args.backends:
+                store, build_seconds = build_store(backend, chunks, tmp_dir)
+                for weight in args.lexical_weights:
+                    retriever = Retriever(vector_store=store, lexical_weight=weight)
+                    for name, queries in query_sets.items():
+                        for k in args.k:
+                            recall, mrr, latencies = evaluate(retriever, queries, k)
+                            row = {
+                                "embeddings": embedder,
+                                "chunk_size": chunk_size,
+                                "chunk_overlap": chunk_overlap,
+                                "backend": backend,
+                                "build_seconds": build_seconds,
+                                "lexical_weight": weight,
+                                "queries": name,
+                                "k": k,
+                                "recall_at_k": recall,
+                                "mrr": mrr,
+                                "p50_ms": np.percentile(latencies, 50),
+                                "p99_ms": np.percentile(latencies, 99),
+                            }
+                            rows.append(row)
+                            print(
+                                f"{label:>10} {backend:>8} {build_seconds:>8.2f} "
+                                f"{weight:>8.2f} {name:>8} {k:>3} {recall:>9.3f} "
+                                f"{mrr:>6.3f} {row['p50_ms']:>7.2f} "
+                                f"{row['p99_ms']:>7.2f}"
+                            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2, default=float)
+
+
+if __name__ == "__main__":
+    main()
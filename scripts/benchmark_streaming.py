@@ -0,0 +1,81 @@
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag.embedding_client import CachedQueryEmbeddings
+from rag.llm import RAG
+from rag.retriever import Retriever
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeChatModel, FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def buffered(rag, query, k):
+    """The old /api/chat: wait for the whole answer, then replay it word by word"""
+    start = time.perf_counter()
+    ttft = None
+    words = rag.answer_question(query, k=k, use_cache=False)["answer"].split()
+    for _ in words:
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        time.sleep(0.05)
+    return ttft, time.perf_counter() - start
+
+
+def streamed(rag, query, k):
+    for event in rag.stream_answer(query, k=k, use_cache=False):
+        if event["type"] == "done":
+            return event["ttft_seconds"], event["total_seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time to first token for buffered vs streamed answers"
+    )
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--first-token", type=float, default=0.4)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--answer-tokens", type=int, default=150)
+    parser.add_argument("--k", type=int, default=6)
+    args = parser.parse_args()
+
+    embeddings = CachedQueryEmbeddings(FakeEmbeddings(request_latency=0.05))
+    store = VectorStore(backend="numpy", embedding_function=embeddings)
+    llm = FakeChatModel(
+        response_latency=args.first_token,
+        token_latency=args.token_latency,
+        answer_tokens=args.answer_tokens,
+    )
+    rag = RAG(llm=llm, retriever=Retriever(vector_store=store), answer_cache=None)
+
+    print(
+        f"{args.requests} requests, {args.answer_tokens}-word answers, "
+        f"{args.first_token * 1000:.0f}ms to first token, "
+        f"{args.token_latency * 1000:.0f}ms per token\n"
+    )
+    print(f"{'mode':>10} {'ttft p50 ms':>12} {'ttft p99 ms':>12} {'total p50 ms':>13}")
+
+    for mode, run in (("buffered", buffered), ("streamed", streamed)):
+        timings = np.array(
+            [run(rag, f"question {i}", args.k) for i in range(args.requests)]
+        )
+        ttft, total = timings[:, 0] * 1000, timings[:, 1] * 1000
+        print(
+            f"{mode:>10} {np.percentile(ttft, 50):>12.1f} "
+            f"{np.percentile(ttft, 99):>12.1f} {np.percentile(total, 50):>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.embedding_store import EmbeddingStore
+from rag.numpy_index import NumpyIndex
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.WARNING)
+
+
+def make_queries(vectors, n_queries, noise=0.05, seed=0):
+    """Perturbed copies of stored vectors, so no embedding calls are needed"""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(vectors), n_queries)
+    queries = vectors[picks] + rng.normal(0, noise, (n_queries, vectors.shape[1]))
+    return queries.astype(np.float32)
+
+
+def time_queries(search, queries, k):
+    """Per-query latencies in milliseconds"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def summarise(name, latencies):
+    return {
+        "backend": name,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(latencies.mean()),
+    }
+
+
+def run_benchmark(store_path, n_queries, k):
+    store = EmbeddingStore.load(store_path)
+    queries = make_queries(np.asarray(store.vectors), n_queries)
+    fake = FakeEmbeddings(dimensions=store.dim, request_latency=0.0)
+    results = []
+
+    # numpy: one matrix-vector product per query
+    index = NumpyIndex.from_store(store, fake)
+    latencies = time_queries(
+        lambda q, k: index.similarity_search_by_vector_with_relevance_scores(q, k=k),
+        queries,
+        k,
+    )
+    results.append(summarise("numpy", latencies))
+
+    # numpy batched: every query in one matrix-matrix product, amortised
+    batch_latencies = []
+    for _ in range(5):
+        start = time.perf_counter()
+        index.similarity_search_by_vectors_with_relevance_scores(queries, k=k)
+        batch_latencies.append((time.perf_counter() - start) * 1000 / n_queries)
+    results.append(summarise("numpy (batched)", np.array(batch_latencies)))
+
+    # chroma: same vectors in a throwaway persistent store
+    with tempfile.TemporaryDirectory() as tmp:
+        chroma = VectorStore(tmp, backend="chroma", embedding_function=fake)
+        chroma.add_embeddings(list(store.chunks()))
+        db = chroma.get_db()
+        latencies = time_queries(
+            lambda q, k: db.similarity_search_by_vector_with_relevance_scores(
+                q.tolist(), k=k
+            ),
+            queries,
+            k,
+        )
+        results.append(summarise("chroma", latencies))
+
+    return results
+
+
+if __name__ == "__main__":
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Compare vector search latency")
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=os.path.join(root, "data/embeddings/embeddings.npy"),
+    )
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=6)
+    args = parser.parse_args()
+
+    print(f"{'backend':<16} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for row in run_benchmark(args.store, args.queries, args.k):
+        print(
+            f"{row['backend']:<16} {row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f} "
+            f"{row['mean_ms']:>8.3f}"
+        )
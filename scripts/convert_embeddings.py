@@ -0,0 +1,83 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.embedding_store import (
+    EmbeddingStore,
+    convert_json_to_store,
+    metadata_path,
+)
+from rag.constants import EMBEDDING_MODEL
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+
+def benchmark_load(json_path, vectors_path, repeats=5):
+    """Compare size and load time of the JSON file and the binary store"""
+    json_size = os.path.getsize(json_path)
+    binary_size = os.path.getsize(vectors_path) + os.path.getsize(
+        metadata_path(vectors_path)
+    )
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        with open(json_path, "r") as f:
+            json.load(f)
+    json_seconds = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        store = EmbeddingStore.load(vectors_path, mmap=True)
+        store.vectors.sum()  # touch every page so the mmap is actually read
+    binary_seconds = (time.perf_counter() - start) / repeats
+
+    logger.info(
+        f"JSON:   {json_size / 1e6:.2f} MB, {json_seconds * 1000:.1f} ms to load"
+    )
+    logger.info(
+        f"Binary: {binary_size / 1e6:.2f} MB, {binary_seconds * 1000:.1f} ms to load"
+    )
+    return {
+        "json_bytes": json_size,
+        "binary_bytes": binary_size,
+        "json_load_seconds": json_seconds,
+        "binary_load_seconds": binary_seconds,
+    }
+
+
+if __name__ == "__main__":
+    root = Path(__file__).resolve().parent.parent
+    parser = argparse.ArgumentParser(description="Convert embeddings JSON to .npy")
+    parser.add_argument(
+        "--input",
+        type=str,
+        default=os.path.join(root, "data/embeddings/chunks_with_embeddings.json"),
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=os.path.join(root, "data/embeddings/embeddings.npy"),
+    )
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument(
+        "--benchmark", action="store_true", help="Report size and load time"
+    )
+    args = parser.parse_args()
+
+    store = convert_json_to_store(
+        args.input, args.output, dtype=args.dtype, model_name=EMBEDDING_MODEL
+    )
+    logger.info(f"Converted {len(store)} embeddings ({store.dim} dims, {args.dtype})")
+
+    if args.benchmark:
+        benchmark_load(args.input, args.output)
@@ -7,8 +7,17 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from database.embeddings import Embeddings
-from database.chunking import DocumentChunker
+from database.cache import EmbeddingCache
+from database.chunking import make_chunker
 from rag.vectorstore import VectorStore
+from rag.constants import (
+    EMBEDDING_MODEL,
+    CHUNKER,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+)
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -30,7 +39,11 @@ def create_embeddings():
     )
     output_file = os.path.join(
         Path(__file__).resolve().parent.parent,
-        "data/embeddings/chunks_with_embeddings.json",
+        "data/embeddings/embeddings.npy",
+    )
+    cache_file = os.path.join(
+        Path(__file__).resolve().parent.parent,
+        "data/embeddings/embedding_cache.sqlite3",
     )
 
     # create output directories
@@ -45,7 +58,9 @@ def create_embeddings():
         logger.info(f"Loaded {len(documents)} articles")
 
         # create chunks
-        chunker = DocumentChunker()
+        chunker = make_chunker(
+            CHUNKER, CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
+        )
         chunks = chunker.chunk_documents(documents)
 
         # save chunks
@@ -62,15 +77,20 @@ def create_embeddings():
         chunks = json.load(f)
     logger.info(f"Loaded {len(chunks)} chunks")
 
-    # initialise embeddings class and create embeddings
-    embeddings = Embeddings()
+    # initialise embeddings class and create embeddings, reusing cached vectors
+    cache = EmbeddingCache(cache_file)
+    embeddings = Embeddings(model_name=EMBEDDING_MODEL, cache=cache)
     chunks_with_embeddings = embeddings.create_embeddings_for_chunks(
         chunks, output_path=output_file
     )
+    logger.info(
+        f"Embedding cache hits: {embeddings.cache_hits}, misses: {embeddings.cache_misses}"
+    )
 
+    # reuse the vectors computed above and only write chunks that changed
     vector_store = VectorStore()
-    vector_store.load_from_chunks_file(chunks_file)
-    logger.info("Vector store populated with chunks")
+    vector_store.sync(chunks_with_embeddings)
+    logger.info("Vector store synced with chunks")
 
     logger.info(
         f"Embedding process complete - {len(chunks_with_embeddings)} chunks processed"
@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import logging
+import argparse
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -23,9 +24,37 @@ raw_dir = os.path.join(script_dir, "data/raw")
 os.makedirs(os.path.dirname(output_file), exist_ok=True)
 os.makedirs(raw_dir, exist_ok=True)
 
+parser = argparse.ArgumentParser(description="Extract articles from Zendesk")
+parser.add_argument(
+    "--incremental",
+    action="store_true",
+    help="Only fetch articles updated since the last extraction",
+)
+parser.add_argument(
+    "--clean-workers",
+    type=int,
+    default=None,
+    help="Processes for HTML cleaning on a full extraction",
+)
+args = parser.parse_args()
+
 # extract articles
 api = VoyZendeskAPI()
-articles = api.extract_all_articles(save_raw=True, raw_dir=raw_dir)
+if args.incremental and os.path.exists(output_file):
+    # use the newest saved article as the high-water mark
+    since = api.get_high_water_mark(raw_dir)
+    updated = api.extract_updated_articles(since, save_raw=True, raw_dir=raw_dir)
+    # deletions don't show up as updates, so check which articles still exist
+    current_ids = api.get_article_ids()
+
+    with open(output_file, "r") as f:
+        existing = json.load(f)
+    articles = api.merge_articles(existing, updated, current_ids)
+    logger.info(f"{len(updated)} articles updated since {since}")
+else:
+    articles = api.extract_all_articles(
+        save_raw=True, raw_dir=raw_dir, clean_workers=args.clean_workers
+    )
 
 # save articles
 with open(output_file, "w") as f:
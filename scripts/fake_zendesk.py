@@ -0,0 +1,183 @@
+import os
+import json
+import glob
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+API_PREFIX = "/api/v2/help_center/en-gb"
+
+
+def load_fixture_articles():
+    """Build fake Help Center content from the saved raw and processed articles"""
+    root = Path(__file__).resolve().parent.parent
+    with open(os.path.join(root, "data/processed/articles.json"), "r") as f:
+        processed = {article["id"]: article for article in json.load(f)}
+
+    articles = []
+    for file_path in sorted(glob.glob(os.path.join(root, "data/raw/article_*.json"))):
+        with open(file_path, "r") as f:
+            article = json.load(f)
+        meta = processed.get(article["id"])
+        if meta is not None:
+            article["_category"] = meta["category"]
+            article["_section"] = meta["section"]
+        articles.append(article)
+    return articles
+
+
+class FakeZendeskServer:
+    """Local stand-in for the Zendesk Help Center API, for tests and benchmarks"""
+
+    def __init__(
+        self,
+        articles=None,
+        page_size=10,
+        latency=0.0,
+        throttle_every=0,
+        retry_after=0.1,
+    ):
+        self.articles = articles if articles is not None else load_fixture_articles()
+        self.page_size = page_size
+        self.latency = latency  # simulated server time per request
+        self.throttle_every = throttle_every  # answer every Nth request with a 429
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.throttled_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_count(self):
+        with self._lock:
+            self.request_count = 0
+            self.throttled_count = 0
+
+    def _public(self, article):
+        return {k: v for k, v in article.items() if not k.startswith("_")}
+
+    def _categories(self):
+        seen = {}
+        for article in self.articles:
+            category = article.get("_category")
+            if category:
+                seen[category["id"]] = {"id": category["id"], "name": category["name"]}
+        return list(seen.values())
+
+    def _sections(self, category_id=None):
+        seen = {}
+        for article in self.articles:
+            section = article.get("_section")
+            category = article.get("_category")
+            if not section or (category_id and category["id"] != category_id):
+                continue
+            seen[section["id"]] = {
+                "id": section["id"],
+                "name": section["name"],
+                "category_id": category["id"],
+            }
+        return list(seen.values())
+
+    def _page(self, key, items, path, query):
+        """Slice a listing into Zendesk-style offset pages"""
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", [str(self.page_size)])[0])
+        start = (page - 1) * per_page
+        body = {key: items[start : start + per_page], "page": page, "count": len(items)}
+
+        if start + per_page < len(items):
+            params = {k: v[0] for k, v in query.items()}
+            params["page"] = str(page + 1)
+            params["per_page"] = str(per_page)
+            qs = "&".join(f"{k}={v}" for k, v in params.items())
+            host, port = self._server.server_address
+            body["next_page"] = f"http://{host}:{port}{path}?{qs}"
+        else:
+            body["next_page"] = None
+        return body
+
+    def route(self, path, query):
+        """Return (status, body) for a request path"""
+        if not path.startswith(API_PREFIX):
+            return 404, {"error": "not found"}
+        parts = path[len(API_PREFIX) :].strip("/").removesuffix(".json").split("/")
+
+        if parts == ["categories"]:
+            return 200, self._page("categories", self._categories(), path, query)
+        if parts == ["sections"]:
+            return 200, self._page("sections", self._sections(), path, query)
+        if len(parts) == 3 and parts[0] == "categories" and parts[2] == "sections":
+            sections = self._sections(int(parts[1]))
+            return 200, self._page("sections", sections, path, query)
+        if len(parts) == 3 and parts[0] == "sections" and parts[2] == "articles":
+            section_id = int(parts[1])
+            listing = [
+                self._public(a)
+                for a in self.articles
+                if a.get("_section", {}).get("id") == section_id
+            ]
+            return 200, self._page("articles", listing, path, query)
+        if parts == ["articles"]:
+            listing = [self._public(a) for a in self.articles]
+            if query.get("sort_by", [""])[0] == "updated_at":
+                reverse = query.get("sort_order", ["desc"])[0] == "desc"
+                listing.sort(key=lambda a: a.get("updated_at", ""), reverse=reverse)
+            return 200, self._page("articles", listing, path, query)
+        if len(parts) == 2 and parts[0] == "articles":
+            for article in self.articles:
+                if str(article["id"]) == parts[1]:
+                    return 200, {"article": self._public(article)}
+        return 404, {"error": "not found"}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                    throttle = (
+                        server.throttle_every
+                        and server.request_count % server.throttle_every == 0
+                    )
+                    if throttle:
+                        server.throttled_count += 1
+                if server.latency:
+                    threading.Event().wait(server.latency)
+
+                if throttle:
+                    self.send_response(429)
+                    self.send_header("Retry-After", str(server.retry_after))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                parsed = urlparse(self.path)
+                status, body = server.route(parsed.path, parse_qs(parsed.query))
+                payload = json.dumps(body).encode("utf-8")
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # keep benchmark output quiet
+
+        return Handler
@@ -0,0 +1,158 @@
+import re
+import math
+import time
+import asyncio
+import random
+import hashlib
+import threading
+from langchain_core.embeddings import Embeddings as BaseEmbeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from rag.reranker import Reranker
+
+
+class FakeEmbeddings(BaseEmbeddings):
+    """Local stand-in for the OpenAI embeddings API, for tests and benchmarks"""
+
+    def __init__(
+        self,
+        dimensions=1536,
+        request_latency=0.05,
+        failure_rate=0.0,
+        bag_of_words=False,
+    ):
+        self.dimensions = dimensions
+        self.request_latency = request_latency  # simulated round trip per call
+        self.failure_rate = failure_rate
+        # sum per-word vectors so texts sharing words land close together
+        self.bag_of_words = bag_of_words
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def _random_vector(self, text):
+        # deterministic gaussian vector seeded by the text
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+        return [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+
+    def _vector(self, text):
+        if self.bag_of_words:
+            vector = [0.0] * self.dimensions
+            for word in re.findall(r"\w+", text.lower()) or [""]:
+                vector = [a + b for a, b in zip(vector, self._random_vector(word))]
+        else:
+            vector = self._random_vector(text)
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector]
+
+    def _request(self):
+        with self._lock:
+            self.request_count += 1
+        time.sleep(self.request_latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("fake embedding backend failure")
+
+    def embed_documents(self, texts):
+        self._request()
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self._request()
+        return self._vector(text)
+
+    async def _arequest(self):
+        with self._lock:
+            self.request_count += 1
+        await asyncio.sleep(self.request_latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("fake embedding backend failure")
+
+    async def aembed_documents(self, texts):
+        await self._arequest()
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text):
+        await self._arequest()
+        return self._vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Local stand-in for the OpenAI chat API that echoes the question back"""
+
+    response_latency: float = 0.5  # simulated time to first token
+    token_latency: float = 0.0  # simulated time between streamed tokens
+    answer_tokens: int = 0  # pad answers to roughly this many words
+    call_count: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-chat"
+
+    def _answer(self, messages):
+        question = re.search(r"question: (.*)", messages[-1].content)
+        topic = question.group(1) if question else "your question"
+        answer = f"Here is what Voy's documentation says about {topic}."
+        padding = self.answer_tokens - len(answer.split())
+        if padding > 0:
+            answer += " " + " ".join(["more"] * padding)
+        return answer
+
+    def _tokens(self, messages):
+        return re.findall(r"\S+\s*", self._answer(messages))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.call_count += 1
+        tokens = self._tokens(messages)
+        time.sleep(self.response_latency + self.token_latency * (len(tokens) - 1))
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.call_count += 1
+        time.sleep(self.response_latency)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.call_count += 1
+        tokens = self._tokens(messages)
+        await asyncio.sleep(
+            self.response_latency + self.token_latency * (len(tokens) - 1)
+        )
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.call_count += 1
+        await asyncio.sleep(self.response_latency)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class FakeReranker(Reranker):
+    """Local stand-in for a cross-encoder: word overlap, with model-like latency"""
+
+    def __init__(
+        self, candidates=20, batch_size=32, batch_latency=0.004, pair_latency=0.001
+    ):
+        super().__init__(candidates, batch_size)
+        self.batch_latency = batch_latency  # fixed cost of each forward pass
+        self.pair_latency = pair_latency  # extra cost per (query, chunk) pair
+
+    def score(self, query, texts):
+        # skip short function words so overlap tracks content words
+        query_words = set(re.findall(r"\w{4,}", query.lower()))
+        scores = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start : start + self.batch_size]
+            time.sleep(self.batch_latency + self.pair_latency * len(batch))
+            for text in batch:
+                words = re.findall(r"\w+", text.lower())
+                overlap = sum(word in query_words for word in words)
+                scores.append(overlap / math.sqrt(len(words) or 1))
+        return scores
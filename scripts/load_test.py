@@ -0,0 +1,158 @@
+import sys
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import threading
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import uvicorn
+from app.asgi import create_app
+from rag.embedding_client import CachedQueryEmbeddings
+from rag.llm import RAG
+from rag.retriever import Retriever
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeChatModel, FakeEmbeddings
+
+logging.basicConfig(
+    level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.WARNING)
+logging.getLogger("app").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def make_rag(args):
+    """RAG wired to local stubs with realistic embedding and LLM latency"""
+    embeddings = CachedQueryEmbeddings(
+        FakeEmbeddings(request_latency=args.embedding_latency)
+    )
+    store = VectorStore(backend="numpy", embedding_function=embeddings)
+    llm = FakeChatModel(
+        response_latency=args.first_token,
+        token_latency=args.token_latency,
+        answer_tokens=args.answer_tokens,
+    )
+    # every question is unique, so the answer cache would only add noise
+    return RAG(llm=llm, retriever=Retriever(vector_store=store), answer_cache=None)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(rag):
+    """Serve the ASGI app from a background thread, return its base URL"""
+    port = free_port()
+    config = uvicorn.Config(
+        create_app(rag), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+async def run_http(url, n_requests, concurrency):
+    """Stream /api/chat with bounded concurrency; returns (ttft, latency) pairs"""
+    semaphore = asyncio.Semaphore(concurrency)
+    # expire idle connections before uvicorn's 5s keep-alive timeout does,
+    # otherwise a reused connection can be closed mid-request
+    limits = httpx.Limits(max_connections=concurrency, keepalive_expiry=2)
+
+    async with httpx.AsyncClient(base_url=url, timeout=300, limits=limits) as client:
+
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                ttft = None
+                body = {"message": f"load test question {i}", "turn_id": f"load-{i}"}
+                async with client.stream("POST", "/api/chat", json=body) as response:
+                    async for line in response.aiter_lines():
+                        if ttft is None and line.startswith("event: token"):
+                            ttft = time.perf_counter() - start
+                return ttft, time.perf_counter() - start
+
+        return await asyncio.gather(*(one(i) for i in range(n_requests)))
+
+
+def run_threads(rag, n_requests, threads):
+    """Baseline: one blocking request per worker thread, like the Flask app"""
+
+    def one(i, submitted):
+        ttft = None
+        for event in rag.stream_answer(f"load test question {i}", use_cache=False):
+            if ttft is None and event["type"] == "token":
+                ttft = time.perf_counter() - submitted
+        return ttft, time.perf_counter() - submitted
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(one, i, time.perf_counter()) for i in range(n_requests)]
+        return [f.result() for f in futures]
+
+
+def report(label, timings, elapsed):
+    ttft = np.array([t for t, _ in timings if t is not None]) * 1000
+    latency = np.array([l for _, l in timings]) * 1000
+    print(
+        f"{label:>22} {len(timings) / elapsed:>8.1f} "
+        f"{np.percentile(ttft, 50):>9.0f} {np.percentile(ttft, 99):>9.0f} "
+        f"{np.percentile(latency, 50):>9.0f} {np.percentile(latency, 99):>9.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test chat serving against stub embedding/LLM services"
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8, help="sync baseline")
+    parser.add_argument("--url", help="test an already running server instead")
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--first-token", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--answer-tokens", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{args.requests} chats, {args.first_token * 1000:.0f}ms to first token, "
+        f"{args.answer_tokens} tokens at {args.token_latency * 1000:.0f}ms\n"
+    )
+    print(
+        f"{'server':>22} {'req/s':>8} {'ttft p50':>9} {'ttft p99':>9} "
+        f"{'p50 ms':>9} {'p99 ms':>9}"
+    )
+
+    if args.url:
+        start = time.perf_counter()
+        timings = asyncio.run(run_http(args.url, args.requests, args.concurrency))
+        report(args.url, timings, time.perf_counter() - start)
+        return
+
+    rag = make_rag(args)
+
+    start = time.perf_counter()
+    timings = run_threads(rag, args.requests, args.threads)
+    report(f"sync, {args.threads} threads", timings, time.perf_counter() - start)
+
+    url, server = start_server(rag)
+    start = time.perf_counter()
+    timings = asyncio.run(run_http(url, args.requests, args.concurrency))
+    report(f"asgi, {args.concurrency} in flight", timings, time.perf_counter() - start)
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import os
 import sys
 import json
+import hashlib
 import logging
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
@@ -12,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from rag.llm import RAG
 from rag.constants import MODEL_NAME, TEMPERATURE, K
+from rag.prompts import PROMPT_VERSION
 from ragas.metrics import (
     Faithfulness,
     AnswerRelevancy,
@@ -39,18 +42,129 @@ def load_eval_dataset(file_path="data/evals/eval_dataset.json"):
             return json.load(f)
 
 
-def prepare_ragas_dataset(questions, rag_system):
+def generation_key(
+    question, retrieval, model_name=MODEL_NAME, k=K, prompt_version=PROMPT_VERSION
+):
+    """Generations only need redoing if one of these inputs changes
+
+    retrieval is RAG.retrieval_config(): backend, hybrid weighting, reranker
+    and a fingerprint of the indexed chunks.
+    """
+    payload = json.dumps(
+        [question, model_name, k, prompt_version, retrieval], sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_generations(checkpoint_path):
+    """Read previously generated answers from the JSONL checkpoint"""
+    generations = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r") as f:
+            for line in f:
+                # a run killed mid-write can leave a truncated last line
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                generations[record["key"]] = record
+    return generations
+
+
+def ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def generate_answers(questions, get_rag, checkpoint_path, max_workers=4, batch_size=32):
+    """Answer questions in batches, checkpointing each answer as it finishes"""
+    generations = load_generations(checkpoint_path)
+    # built even if every answer is reused: the keys depend on its retrieval setup
+    rag_system = get_rag()
+    retrieval = rag_system.retrieval_config()
+    keys = [generation_key(item["question"], retrieval) for item in questions]
+    pending = [
+        (key, item["question"])
+        for key, item in zip(keys, questions)
+        if key not in generations
+    ]
+    logger.info(
+        f"{len(questions) - len(pending)} answers reused from {checkpoint_path}, "
+        f"{len(pending)} to generate"
+    )
+
+    if pending:
+
+        def record(key, query, result):
+            return {
+                "key": key,
+                "question": query,
+                "answer": result["answer"],
+                "contexts": [doc["content"] for doc in result["context"]],
+                "model_name": MODEL_NAME,
+                "k": K,
+                "prompt_version": PROMPT_VERSION,
+                "retrieval": retrieval,
+            }
+
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+        with open(checkpoint_path, "a") as f:
+            # start on a fresh line if the last run died mid-record
+            if f.tell() > 0 and not ends_with_newline(checkpoint_path):
+                f.write("\n")
+            failed = 0
+            progress = tqdm(total=len(pending))
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start : start + batch_size]
+
+                def save(position, result):
+                    # written as each answer arrives, so a killed run loses none
+                    nonlocal failed
+                    progress.update()
+                    key, query = batch[position]
+                    if isinstance(result, Exception):
+                        logger.error(f"Error generating answer: {str(result)}")
+                        failed += 1
+                        return
+                    generations[key] = record(key, query, result)
+                    f.write(json.dumps(generations[key]) + "\n")
+                    f.flush()
+
+                # evaluate fresh generations, not answers reused from similar
+                # questions; a failed question doesn't stop the rest of the batch
+                rag_system.answer_batch(
+                    [query for _, query in batch],
+                    k=K,
+                    use_cache=False,
+                    max_concurrency=max_workers,
+                    return_exceptions=True,
+                    on_result=save,
+                )
+            progress.close()
+
+        if failed:
+            raise RuntimeError(
+                f"{failed} questions failed; rerun to retry just those questions"
+            )
+
+    return [generations[key] for key in keys]
+
+
+def prepare_ragas_dataset(
+    questions, get_rag, checkpoint_path, max_workers=4, batch_size=32
+):
     """Put dataset ito RAGAS format"""
     ragas_data = {"question": [], "answer": [], "contexts": [], "ground_truth": []}
 
     logger.info("generating answers for evaluation dataset...")
-    for item in tqdm(questions):
-        query = item["question"]
-        result = rag_system.answer_question(query, k=K)
-
-        ragas_data["question"].append(query)
-        ragas_data["answer"].append(result["answer"])
-        ragas_data["contexts"].append([doc["content"] for doc in result["context"]])
+    generations = generate_answers(
+        questions, get_rag, checkpoint_path, max_workers, batch_size
+    )
+    for item, generation in zip(questions, generations):
+        ragas_data["question"].append(item["question"])
+        ragas_data["answer"].append(generation["answer"])
+        ragas_data["contexts"].append(generation["contexts"])
 
         if "ground_truth" in item:
             ragas_data["ground_truth"].append(item["ground_truth"])
@@ -141,17 +255,45 @@ def analyse_issues(ragas_data, results_df):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Run RAGAS evaluations")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="questions answered concurrently"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+        help="questions embedded and retrieved together (answers are still "
+        "checkpointed one by one)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default="data/eval_results/generations.jsonl",
+        help="per-question answers, reused by later runs",
+    )
+    parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="ignore the checkpoint and generate every answer again",
+    )
+    args = parser.parse_args()
+
+    if args.regenerate and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
 
-    # initialise RAG
-    logger.info(f"Initialising RAG system with model: {MODEL_NAME}")
-    rag = RAG(model_name=MODEL_NAME, temperature=TEMPERATURE)
+    def get_rag():
+        # initialise RAG
+        logger.info(f"Initialising RAG system with model: {MODEL_NAME}")
+        return RAG(model_name=MODEL_NAME, temperature=TEMPERATURE)
 
     # get evals
     eval_dataset = load_eval_dataset()
     logger.info(f"Loaded {len(eval_dataset)} evaluation questions")
 
     # prepare data for ragas
-    ragas_data = prepare_ragas_dataset(eval_dataset, rag)
+    ragas_data = prepare_ragas_dataset(
+        eval_dataset, get_rag, args.checkpoint, args.workers, args.batch_size
+    )
 
     # run evaluations
     results = run_evaluations(ragas_data)
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.get_data import VoyZendeskAPI
+from database.chunking import make_chunker
+from database.embeddings import Embeddings
+from database.cache import EmbeddingCache
+from database.pipeline import IngestPipeline
+from rag.vectorstore import VectorStore
+from rag.constants import (
+    EMBEDDING_MODEL,
+    CHUNKER,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+logger = logging.getLogger(__name__)
+
+
+def run_pipeline(queue_size=64, batch_size=64, base_url=None, save_raw=True):
+    """Stream articles from Zendesk straight into the vector store"""
+    root = Path(__file__).resolve().parent.parent
+    raw_dir = os.path.join(root, "data/raw")
+    cache_file = os.path.join(root, "data/embeddings/embedding_cache.sqlite3")
+
+    pipeline = IngestPipeline(
+        api=VoyZendeskAPI(base_url=base_url),
+        chunker=make_chunker(
+            CHUNKER, CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS
+        ),
+        embedder=Embeddings(
+            model_name=EMBEDDING_MODEL, cache=EmbeddingCache(cache_file)
+        ),
+        vector_store=VectorStore(),
+        queue_size=queue_size,
+        batch_size=batch_size,
+        save_raw=save_raw,
+        raw_dir=raw_dir,
+    )
+    return pipeline.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the streaming ingest pipeline")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--base-url", type=str, default=None, help="Zendesk API URL")
+    parser.add_argument("--no-save-raw", action="store_true")
+    args = parser.parse_args()
+
+    summary = run_pipeline(
+        queue_size=args.queue_size,
+        batch_size=args.batch_size,
+        base_url=args.base_url,
+        save_raw=not args.no_save_raw,
+    )
+    print(json.dumps(summary, indent=2))
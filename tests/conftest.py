@@ -0,0 +1,89 @@
+import sys
+import copy
+import pytest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.chunking import DocumentChunker
+from rag.embedding_client import CachedQueryEmbeddings
+from rag.vectorstore import VectorStore
+from scripts.fakes import FakeEmbeddings
+
+ARTICLES = [
+    {
+        "id": 1,
+        "title": "Cancelling an order",
+        "body": "You can cancel an order before it is dispatched. "
+        "Go to your account, open the order and choose cancel. "
+        "Refunds reach your card within five working days.",
+        "url": "https://example.com/1",
+        "category": {"id": 10, "name": "Orders & Delivery"},
+        "section": {"id": 100, "name": "Orders"},
+        "tags": ["cancel", "refund"],
+        "updated_at": "2025-01-10T09:00:00Z",
+    },
+    {
+        "id": 2,
+        "title": "Wegovy titration",
+        "body": "Wegovy starts at 0.25mg and increases every 28 days. "
+        "You can stay on the same dose if side effects are strong. "
+        "Speak to your clinician before changing dose.",
+        "url": "https://example.com/2",
+        "category": {"id": 20, "name": "Medication"},
+        "section": {"id": 200, "name": "Dosing"},
+        "tags": ["wegovy"],
+        "updated_at": "2025-02-01T09:00:00Z",
+    },
+    {
+        "id": 3,
+        "title": "Payment options",
+        "body": "We accept debit and credit cards, including American Express. "
+        "PayPal is available at checkout only.",
+        "url": "https://example.com/3",
+        "category": {"id": 30, "name": "Account & Subscription Management"},
+        "section": {"id": 300, "name": "Billing"},
+        "tags": ["payment"],
+        "updated_at": "2024-12-01T09:00:00Z",
+    },
+]
+
+
+@pytest.fixture
+def embeddings():
+    return CachedQueryEmbeddings(FakeEmbeddings(request_latency=0, bag_of_words=True))
+
+
+@pytest.fixture
+def articles():
+    return copy.deepcopy(ARTICLES)
+
+
+@pytest.fixture
+def embed_chunks(embeddings):
+    """Chunk articles and attach vectors, as create_embeddings.py would"""
+
+    def embed(articles):
+        chunker = DocumentChunker(chunk_size=120, chunk_overlap=20)
+        chunks = chunker.chunk_documents(articles)
+        vectors = embeddings.embed_documents([chunk["text"] for chunk in chunks])
+        for chunk, vector in zip(chunks, vectors):
+            chunk["embedding"] = vector
+        return chunks
+
+    return embed
+
+
+@pytest.fixture
+def make_store(tmp_path, embeddings):
+    """Factory for stores that persist under tmp_path, so reopening reloads them"""
+
+    def make(backend="numpy"):
+        return VectorStore(
+            backend=backend,
+            embedding_function=embeddings,
+            index_path=str(tmp_path / f"{backend}.npy"),
+            persist_directory=str(tmp_path / backend),
+        )
+
+    return make
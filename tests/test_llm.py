@@ -0,0 +1,157 @@
+import copy
+import pytest
+from rag.answer_cache import SemanticAnswerCache
+from rag.llm import RAG
+from rag.retriever import Retriever
+from scripts.fakes import FakeChatModel
+
+
+class SlowFirstChatModel(FakeChatModel):
+    """Answers questions mentioning "slow" last, so completions arrive out of order"""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.response_latency = 0.2 if "slow" in messages[-1].content else 0.0
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+class FailingChatModel(FakeChatModel):
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if "fail" in messages[-1].content:
+            raise RuntimeError("llm down")
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+
+@pytest.fixture
+def store(make_store, articles, embed_chunks):
+    store = make_store()
+    store.sync(embed_chunks(articles))
+    return store
+
+
+def make_rag(store, llm=None, answer_cache=None):
+    llm = llm if llm is not None else FakeChatModel(response_latency=0)
+    return RAG(
+        llm=llm,
+        retriever=Retriever(vector_store=store),
+        answer_cache=(
+            answer_cache if answer_cache is not None else SemanticAnswerCache()
+        ),
+    )
+
+
+def test_answer_batch_keeps_input_order(store):
+    rag = make_rag(store, SlowFirstChatModel(response_latency=0))
+    queries = [
+        "slow: how do I cancel an order?",
+        "Which payment options are there?",
+        "What is the Wegovy starting dose?",
+        "WHICH payment options are there?",
+    ]
+    finished = []
+
+    answers = rag.answer_batch(
+        queries, k=2, use_cache=False, on_result=lambda i, _: finished.append(i)
+    )
+
+    assert [a["question"] for a in answers] == queries
+    for query, answer in zip(queries[:3], answers):
+        assert query in answer["answer"]
+    # questions differing only in case share one LLM call
+    assert rag.llm.call_count == 3
+    assert sorted(finished) == [0, 1, 2, 3] and finished[-1] == 0
+
+
+def test_answer_batch_matches_answer_question(store):
+    rag = make_rag(store)
+    queries = ["How do I cancel an order?", "Which payment options are there?"]
+
+    batched = rag.answer_batch(queries, k=2, use_cache=False)
+
+    for query, answer in zip(queries, batched):
+        single = rag.answer_question(query, k=2, use_cache=False)
+        assert [d["metadata"]["chunk_id"] for d in answer["context"]] == [
+            d["metadata"]["chunk_id"] for d in single["context"]
+        ]
+
+
+def test_answer_batch_returns_exceptions_in_place(store):
+    rag = make_rag(store, FailingChatModel(response_latency=0))
+    queries = ["How do I cancel an order?", "please fail", "What is Wegovy?"]
+
+    answers = rag.answer_batch(queries, k=2, use_cache=False, return_exceptions=True)
+
+    assert isinstance(answers[1], RuntimeError)
+    assert answers[0]["question"] == queries[0]
+    assert answers[2]["question"] == queries[2]
+    assert rag.batch_stats["failed"] == 1
+
+
+def test_cache_reuses_answer_for_same_question_and_context(store):
+    rag = make_rag(store)
+    first = rag.answer_question("How do I cancel an order?", k=2)
+    second = rag.answer_question("how do i cancel an order", k=2)
+
+    assert rag.llm.call_count == 1
+    assert second["answer"] == first["answer"]
+    assert second["question"] == "how do i cancel an order"
+    assert rag.answer_cache.hits == 1
+
+
+def test_cache_misses_when_context_differs(store):
+    rag = make_rag(store)
+    rag.answer_question("How do I cancel an order?", k=2)
+    other_context = rag.retrieve_context("Which payment options are there?", k=2)
+
+    result = rag.answer_question(
+        "How do I cancel an order?", k=2, context_docs=other_context
+    )
+
+    # an answer built from other chunks is never reused, and the sources
+    # returned are the ones passed in
+    assert rag.llm.call_count == 2
+    assert result["context"] == other_context
+
+
+def test_cache_misses_for_dissimilar_questions(store):
+    rag = make_rag(store, answer_cache=SemanticAnswerCache(threshold=0.99))
+    context = rag.retrieve_context("How do I cancel an order?", k=2)
+    rag.answer_question("How do I cancel an order?", k=2, context_docs=context)
+    rag.answer_question("Refund card dispatched?", k=2, context_docs=context)
+
+    assert rag.llm.call_count == 2
+
+
+def test_stream_answer_sources_come_from_this_turn(store):
+    rag = make_rag(store)
+    list(rag.stream_answer("How do I cancel an order?", k=2))
+    context = rag.retrieve_context("How do I cancel an order?", k=2)
+
+    events = list(
+        rag.stream_answer("how do I cancel an order", k=2, context_docs=context)
+    )
+
+    assert rag.llm.call_count == 1  # served from the cache
+    assert events[0] == {"type": "sources", "sources": context}
+
+
+def test_cache_clears_when_index_changes(store, articles, embed_chunks):
+    rag = make_rag(store)
+    rag.answer_question("How do I cancel an order?", k=2)
+
+    changed = copy.deepcopy(articles)
+    changed[2]["body"] = "Only PayPal is accepted."
+    store.sync(embed_chunks(changed))
+    rag.answer_question("How do I cancel an order?", k=2)
+
+    assert rag.llm.call_count == 2
+
+
+def test_semantic_answer_cache_matches_on_key_and_similarity():
+    cache = SemanticAnswerCache(threshold=0.9)
+    key = (("gpt-4o", "v1", 2, None, None), ("a", "b"))
+    cache.store([1.0, 0.0], key, {"answer": "yes", "context": []})
+
+    assert cache.lookup([0.99, 0.05], key)["answer"] == "yes"
+    assert cache.lookup([0.99, 0.05], (key[0], ("a", "c"))) is None
+    assert cache.lookup([0.0, 1.0], key) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
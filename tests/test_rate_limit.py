@@ -0,0 +1,41 @@
+import time
+import threading
+from api.rate_limit import TokenBucket
+
+
+def time_acquire(bucket):
+    start = time.monotonic()
+    bucket.acquire()
+    return time.monotonic() - start
+
+
+def test_acquire_paces_requests():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.acquire()
+    assert 0.03 < time_acquire(bucket) < 0.2
+
+
+def test_concurrent_pauses_do_not_stack():
+    bucket = TokenBucket(rate=20, capacity=1)
+    # several workers hitting the same 429 all ask for the same pause
+    workers = [threading.Thread(target=bucket.pause, args=(0.3,)) for _ in range(5)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert 0.25 < time_acquire(bucket) < 0.6
+
+
+def test_longer_pause_extends_a_shorter_one():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.pause(0.1)
+    bucket.pause(0.4)
+    assert 0.35 < time_acquire(bucket) < 0.7
+
+
+def test_shorter_pause_keeps_a_longer_one():
+    bucket = TokenBucket(rate=20, capacity=1)
+    bucket.pause(0.4)
+    bucket.pause(0.1)
+    assert 0.35 < time_acquire(bucket) < 0.7
@@ -0,0 +1,77 @@
+import copy
+import pytest
+
+BACKENDS = ["numpy", "ivf", "chroma"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sync_upserts_new_chunks(make_store, articles, embed_chunks, backend):
+    store = make_store(backend)
+    chunks = embed_chunks(articles)
+
+    summary = store.sync(copy.deepcopy(chunks))
+
+    assert summary["upserted"] == len(chunks)
+    assert store.get_stored_ids() == {c["metadata"]["chunk_id"] for c in chunks}
+    assert store.sync(copy.deepcopy(chunks))["unchanged"] == len(chunks)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sync_deletes_removed_and_changed_chunks(
+    make_store, articles, embed_chunks, backend
+):
+    store = make_store(backend)
+    store.sync(embed_chunks(articles))
+
+    articles[0]["body"] = "Orders can no longer be cancelled online."
+    chunks = embed_chunks(articles[:2])  # article 3 was deleted
+    summary = store.sync(copy.deepcopy(chunks))
+
+    stored = store.get_stored_ids()
+    assert stored == {c["metadata"]["chunk_id"] for c in chunks}
+    assert summary["deleted"] > 0 and summary["upserted"] > 0
+    assert not any(chunk_id.startswith("3-") for chunk_id in stored)
+    # the keyword index follows the deletes without an explicit rebuild
+    assert set(store.lexical.ids) == stored
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sync_retags_moved_articles(make_store, articles, embed_chunks, backend):
+    store = make_store(backend)
+    store.sync(embed_chunks(articles))
+
+    articles[1]["category"]["name"] = "Moved"
+    chunks = embed_chunks(articles)
+    summary = store.sync(copy.deepcopy(chunks))
+
+    moved = [c for c in chunks if c["metadata"]["doc_id"] == 2]
+    assert summary["retagged"] == len(moved)
+    assert summary["upserted"] == 0 and summary["deleted"] == 0
+    rows = store.filter_rows({"category": "Moved"})
+    assert sorted(store.row_ids[row] for row in rows) == sorted(
+        c["metadata"]["chunk_id"] for c in moved
+    )
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sync_persists_for_the_next_process(
+    make_store, articles, embed_chunks, backend
+):
+    store = make_store(backend)
+    chunks = embed_chunks(articles)
+    store.sync(copy.deepcopy(chunks))
+
+    reopened = make_store(backend)
+
+    assert reopened.get_stored_ids() == store.get_stored_ids()
+    assert reopened.facets.values()["category"] == store.facets.values()["category"]
+
+
+def test_filter_rejects_malformed_filters(make_store, articles, embed_chunks):
+    store = make_store()
+    store.sync(embed_chunks(articles))
+
+    for bad in ["Orders", ["Orders"], {"category": 5}, {"bogus": "x"}]:
+        with pytest.raises(ValueError):
+            store.filter_rows(bad)
+    assert len(store.filter_rows({"category": "nowhere"})) == 0